@@ -0,0 +1,74 @@
+"""
+Per-user subreddit activity index
+
+Built in a single pass over a user's posts and comments, the index records
+for every subreddit how many posts and comments the user made there, their
+total score and the first/last activity timestamps, so rankings never need
+to rescan the post list.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from models import RedditPost
+
+
+@dataclass
+class SubredditActivity:
+    """Activity counters for one subreddit"""
+    subreddit: str
+    posts: int = 0
+    comments: int = 0
+    total_score: int = 0
+    first_utc: Optional[float] = None
+    last_utc: Optional[float] = None
+
+    @property
+    def items(self) -> int:
+        return self.posts + self.comments
+
+    def describe(self) -> str:
+        """One-line summary used in persona reports"""
+        summary = (f"r/{self.subreddit}: {self.items} items ({self.posts} posts, "
+                   f"{self.comments} comments), total score {self.total_score}")
+        if self.first_utc is not None:
+            first = datetime.fromtimestamp(self.first_utc, tz=timezone.utc).strftime("%Y-%m-%d")
+            last = datetime.fromtimestamp(self.last_utc, tz=timezone.utc).strftime("%Y-%m-%d")
+            summary += f", active {first} to {last}"
+        return summary
+
+
+class ActivityIndex:
+    """Subreddit activity index updated one post at a time"""
+
+    def __init__(self):
+        self.subreddits: Dict[str, SubredditActivity] = {}
+
+    def __len__(self) -> int:
+        return len(self.subreddits)
+
+    def add(self, post: RedditPost):
+        """Record one post or comment"""
+        activity = self.subreddits.get(post.subreddit)
+        if activity is None:
+            activity = self.subreddits[post.subreddit] = SubredditActivity(post.subreddit)
+
+        if post.post_type == "post":
+            activity.posts += 1
+        else:
+            activity.comments += 1
+        activity.total_score += post.score
+
+        if post.created_utc:
+            if activity.first_utc is None or post.created_utc < activity.first_utc:
+                activity.first_utc = post.created_utc
+            if activity.last_utc is None or post.created_utc > activity.last_utc:
+                activity.last_utc = post.created_utc
+
+    def ranked(self, limit: Optional[int] = None) -> List[SubredditActivity]:
+        """Return subreddits by item count, then total score, most active first"""
+        ranking = sorted(self.subreddits.values(),
+                         key=lambda activity: (activity.items, activity.total_score),
+                         reverse=True)
+        return ranking[:limit] if limit is not None else ranking
@@ -0,0 +1,196 @@
+"""
+Asynchronous scraping backend for the Reddit User Persona Analyzer
+
+Fetches the submission and comment listings of many users at once over a
+shared aiohttp connection pool, using the same public JSON endpoints as
+SimpleRedditAnalyzer.fetch_reddit_data. Both listings of a user are paged
+concurrently and RedditPost objects are yielded as soon as each page arrives,
+so the time spent on one user is roughly that of its longest listing.
+Requests go through a RequestScheduler (a fresh create_scheduler() unless
+one is shared), so they are rate limited and retried like PRAW's.
+
+RedditUserAnalyzer uses this backend for scraping with
+scrape_backend="async" (--scrape-backend async).
+
+Usage:
+    posts_by_user = scrape_users(["kojied", "Hungry-Move-6603"], limit=100)
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+import aiohttp
+
+from instrumentation import METRICS, stage
+from models import PostBatch, RedditPost
+from ratelimit import RequestScheduler, RetryableResponse, RETRYABLE_STATUS, create_scheduler
+
+REDDIT_BASE_URL = "https://www.reddit.com"
+
+# Listing path for each RedditPost.post_type
+LISTINGS = {
+    'post': 'submitted',
+    'comment': 'comments',
+}
+
+# Largest page size the listing endpoints accept
+PAGE_SIZE = 100
+
+
+class AsyncRedditScraper:
+    """Concurrent Reddit listing scraper sharing one HTTP connection pool"""
+
+    def __init__(self, user_agent: str = 'PersonaAnalyzer/1.0', max_connections: int = 20,
+                 base_url: str = REDDIT_BASE_URL, scheduler: Optional[RequestScheduler] = None,
+                 timeout: float = 30):
+        self.user_agent = user_agent
+        self.max_connections = max_connections
+        self.base_url = base_url.rstrip('/')
+        # Every request is rate limited and retried, shared with other clients when passed in
+        self.scheduler = scheduler or create_scheduler()
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncRedditScraper':
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={'User-Agent': self.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def _fetch_page(self, username: str, listing: str, limit: int,
+                          after: Optional[str]) -> Dict:
+        """Fetch one page of a user listing as decoded JSON"""
+        if self.session is None:
+            raise Exception("AsyncRedditScraper must be used as an async context manager")
+
+        params = {'limit': str(limit), 'raw_json': '1'}
+        if after:
+            params['after'] = after
+
+        url = f"{self.base_url}/user/{username}/{listing}.json"
+
+        async def get():
+            async with self.session.get(url, params=params) as response:
+                self.scheduler.observe_headers('reddit', response.headers)
+                if response.status in (403, 404):
+                    raise Exception(f"User '{username}' not found or may be suspended")
+                if response.status in RETRYABLE_STATUS:
+                    raise RetryableResponse(response, response.status)
+                response.raise_for_status()
+                body = await response.read()
+                METRICS.inc("persona_bytes_total", len(body), stage="reddit_request")
+                return json.loads(body)
+
+        with stage("reddit_request", username=username, listing=listing) as span:
+            page = await self.scheduler.call_async('reddit', get)
+            span.add("items", len(page.get('data', {}).get('children', [])))
+            return page
+
+    async def iter_listing(self, username: str, post_type: str, limit: int = 100,
+                           since: Optional[float] = None) -> AsyncIterator[RedditPost]:
+        """Yield up to limit items of one listing, following the after cursor
+
+        Listings are newest first, so paging stops at the first item that
+        is not newer than since.
+        """
+        listing = LISTINGS[post_type]
+        count = 0
+        after = None
+
+        while count < limit:
+            page = await self._fetch_page(username, listing, min(PAGE_SIZE, limit - count), after)
+            data = page.get('data', {})
+            children = data.get('children', [])
+
+            for child in children[:limit - count]:
+                post = RedditPost.from_listing_item(child)
+                if since is not None and post.created_utc <= since:
+                    return
+                yield post
+                count += 1
+
+            after = data.get('after')
+            if not after or not children:
+                break
+
+    async def iter_user(self, username: str, limit: int = 100,
+                        since: Optional[Dict[str, float]] = None) -> AsyncIterator[RedditPost]:
+        """Yield a user's posts and comments as pages of either listing arrive
+
+        since maps post_type to a created_utc high-water mark, as in
+        RedditUserAnalyzer.iter_user_data.
+        """
+        since = since or {}
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def pump(post_type: str):
+            try:
+                async for post in self.iter_listing(username, post_type, limit, since.get(post_type)):
+                    await queue.put(post)
+                await queue.put(finished)
+            except Exception as e:
+                await queue.put(e)
+
+        tasks = [asyncio.create_task(pump(post_type)) for post_type in LISTINGS]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is finished:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the cancelled pumps unwind before their session can be closed
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def scrape_user(self, username: str, limit: int = 100,
+                          since: Optional[Dict[str, float]] = None) -> PostBatch:
+        """Collect all posts and comments of one user into a columnar batch"""
+        batch = PostBatch()
+        async for post in self.iter_user(username, limit, since):
+            batch.append(post)
+        return batch
+
+    async def scrape_users(self, usernames: Iterable[str], limit: int = 100,
+                           concurrency: int = 10) -> Dict[str, PostBatch]:
+        """Scrape many users with at most concurrency users in flight
+
+        Users that fail to scrape are reported and left out of the result.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        results: Dict[str, PostBatch] = {}
+
+        async def scrape_one(username: str):
+            async with semaphore:
+                try:
+                    results[username] = await self.scrape_user(username, limit)
+                    print(f"✅ Collected {len(results[username])} posts and comments for {username}")
+                except Exception as e:
+                    print(f"❌ Error scraping user data for {username}: {e}")
+
+        await asyncio.gather(*(scrape_one(username) for username in usernames))
+        return results
+
+
+def scrape_users(usernames: Iterable[str], limit: int = 100, concurrency: int = 10,
+                 **scraper_kwargs) -> Dict[str, PostBatch]:
+    """Synchronous wrapper running AsyncRedditScraper.scrape_users to completion"""
+    async def run():
+        async with AsyncRedditScraper(**scraper_kwargs) as scraper:
+            return await scraper.scrape_users(usernames, limit, concurrency)
+
+    return asyncio.run(run())
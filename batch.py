@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Batch Reddit User Persona Analyzer
+
+Runs generate_persona over a file or stdin stream of Reddit profile URLs
+with a bounded pool of worker threads. All workers share one request
+scheduler (rate limits and retries for Reddit and OpenAI), so throughput is
+bounded by the API quotas rather than by the latency of each request.
+
+Usage:
+    python batch.py urls.txt --workers 8 --output-dir personas
+    cat urls.txt | python batch.py --workers 8
+    python batch.py urls.txt --jsonl personas.jsonl
+"""
+
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO, Tuple
+
+from config import AnalysisConfig, APIConfig, CacheConfig, InstrumentationConfig
+from instrumentation import METRICS, configure_logging, start_metrics_server
+from llm_cache import ResponseCache
+from main import RedditUserAnalyzer
+from persona_result import JsonlWriter, render_markdown
+from post_store import PostStore
+from ratelimit import create_scheduler
+
+if TYPE_CHECKING:
+    from cohort_index import CohortIndex
+
+
+def iter_profile_urls(stream: TextIO) -> Iterator[str]:
+    """Yield profile URLs from a text stream, skipping blank and comment lines"""
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url
+
+
+class BatchRunner:
+    """Generate personas for many users with a bounded worker pool"""
+
+    def __init__(self, workers: int = 4, output_dir: str = ".",
+                 rate_limit: float = APIConfig.REDDIT_RATE_LIMIT,
+                 store: Optional[PostStore] = None, jsonl_writer: Optional[JsonlWriter] = None,
+                 prometheus_file: Optional[str] = None, rules_only: bool = False,
+                 rule_classifier: str = AnalysisConfig.RULE_CLASSIFIER,
+                 cohort_index: Optional['CohortIndex'] = None,
+                 scrape_backend: str = APIConfig.REDDIT_SCRAPE_BACKEND):
+        self.workers = max(workers, 1)
+        self.output_dir = output_dir
+        # When set, every result goes to this one JSONL stream instead of a file per user
+        self.jsonl_writer = jsonl_writer
+        # Rewritten after every user so a textfile collector always sees fresh totals
+        self.prometheus_file = prometheus_file
+        self.scheduler = create_scheduler(reddit_rate_limit=rate_limit)
+        self.store = store
+        self.rules_only = rules_only
+        self.rule_classifier = rule_classifier
+        self.scrape_backend = scrape_backend
+        # Every generated persona is indexed for cohort queries
+        self.cohort_index = cohort_index
+        # One response cache for all workers so repeated prompts are only paid once
+        self.response_cache = ResponseCache(CacheConfig.LLM_CACHE_MAX_ENTRIES, CacheConfig.LLM_CACHE_TTL)
+        # PRAW clients are not thread-safe, so each worker keeps its own analyzer
+        self._local = threading.local()
+
+    def _analyzer(self) -> RedditUserAnalyzer:
+        """Return the analyzer owned by the current worker thread"""
+        analyzer = getattr(self._local, 'analyzer', None)
+        if analyzer is None:
+            analyzer = RedditUserAnalyzer(scheduler=self.scheduler, store=self.store,
+                                          response_cache=self.response_cache, rules_only=self.rules_only,
+                                          rule_classifier=self.rule_classifier,
+                                          scrape_backend=self.scrape_backend)
+            self._local.analyzer = analyzer
+        return analyzer
+
+    def process(self, profile_url: str, cached_only: bool = False) -> Tuple[str, Optional[str], Optional[str]]:
+        """Generate and save one persona, returning (url, filename, error)
+
+        cached_only analyzes the post store's history without scraping.
+        """
+        analyzer = self._analyzer()
+        try:
+            result = analyzer.build_result(profile_url, cached_only=cached_only)
+        except Exception as e:
+            return profile_url, None, str(e)
+
+        if self.jsonl_writer:
+            self.jsonl_writer.write(result)
+            filename = self.jsonl_writer.path
+        else:
+            filename = analyzer.save_persona(render_markdown(result), result.username, self.output_dir)
+            if not filename:
+                return profile_url, None, "could not write persona file"
+
+        if self.cohort_index:
+            self.cohort_index.try_add(result)
+        return profile_url, filename, None
+
+    def run(self, profile_urls: Iterable[str]) -> Tuple[int, int]:
+        """Process every URL and return (succeeded, failed) counts
+
+        At most twice the worker count is queued at once, so arbitrarily long
+        URL streams are consumed lazily.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        succeeded = failed = 0
+        max_pending = self.workers * 2
+        pending = set()
+        urls = iter(profile_urls)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                for url in urls:
+                    pending.add(executor.submit(self.process, url))
+                    if len(pending) >= max_pending:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, filename, error = future.result()
+                    if error:
+                        failed += 1
+                        print(f"❌ {url}: {error}")
+                    else:
+                        succeeded += 1
+                        print(f"✅ [{succeeded + failed}] {url} -> {filename}")
+                if self.prometheus_file:
+                    METRICS.write_prometheus(self.prometheus_file)
+
+        return succeeded, failed
+
+
+def main(argv=None):
+    """Command line entry point for batch persona generation"""
+    parser = argparse.ArgumentParser(description="Generate Reddit personas for many profile URLs")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file with one profile URL per line ('-' or omitted for stdin)")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="number of users analyzed concurrently (default: 4)")
+    parser.add_argument('--output-dir', default='.',
+                        help="directory for {username}_persona.txt files")
+    parser.add_argument('--jsonl', default=None,
+                        help="append structured results to this JSONL file instead of writing text files")
+    parser.add_argument('--rate-limit', type=float, default=APIConfig.REDDIT_RATE_LIMIT,
+                        help="Reddit requests per minute shared by all workers")
+    parser.add_argument('--rules-only', action='store_true',
+                        help="skip OpenAI and use rule-based analysis only (openai is never imported)")
+    parser.add_argument('--classifier', choices=['keywords', 'embeddings'], default=AnalysisConfig.RULE_CLASSIFIER,
+                        help="how rule-based analysis detects interests, personality and age")
+    parser.add_argument('--scrape-backend', choices=['praw', 'async'], default=APIConfig.REDDIT_SCRAPE_BACKEND,
+                        help="scrape each user's listings one after the other (praw) or concurrently (async)")
+    parser.add_argument('--metrics-log', default=InstrumentationConfig.METRICS_LOG_PATH,
+                        help="write structured JSON stage logs to this file ('-' for stderr)")
+    parser.add_argument('--prometheus-file', default=InstrumentationConfig.PROMETHEUS_FILE,
+                        help="keep Prometheus text metrics in this file")
+    parser.add_argument('--metrics-port', type=int, default=InstrumentationConfig.PROMETHEUS_PORT,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--post-store', default=CacheConfig.POST_STORE_PATH,
+                        help="SQLite cache of scraped posts ('' to disable)")
+    parser.add_argument('--cohort-index', default=CacheConfig.COHORT_INDEX_PATH,
+                        help="SQLite index of analyzed users for cohort_index.py queries ('' to disable)")
+    args = parser.parse_args(argv)
+
+    print("🚀 Reddit User Persona Analyzer (batch mode)")
+    print("=" * 50)
+
+    missing_vars = [var for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET') if not os.getenv(var)]
+    if missing_vars:
+        print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
+        return 1
+
+    if args.metrics_log:
+        configure_logging(args.metrics_log)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        print(f"📈 Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+    store = PostStore(args.post_store) if args.post_store else None
+    jsonl_writer = JsonlWriter(args.jsonl) if args.jsonl else None
+    from cohort_index import CohortIndex
+    cohort_index = CohortIndex(args.cohort_index) if args.cohort_index else None
+    runner = BatchRunner(workers=args.workers, output_dir=args.output_dir,
+                         rate_limit=args.rate_limit, store=store, jsonl_writer=jsonl_writer,
+                         prometheus_file=args.prometheus_file, rules_only=args.rules_only,
+                         rule_classifier=args.classifier, cohort_index=cohort_index,
+                         scrape_backend=args.scrape_backend)
+
+    try:
+        if args.input == '-':
+            succeeded, failed = runner.run(iter_profile_urls(sys.stdin))
+        else:
+            with open(args.input, encoding='utf-8') as f:
+                succeeded, failed = runner.run(iter_profile_urls(f))
+    finally:
+        if jsonl_writer:
+            jsonl_writer.close()
+        if cohort_index:
+            cohort_index.compile()
+            cohort_index.close()
+
+    print(f"\n📄 Batch complete: {succeeded} personas written, {failed} failed")
+    cache_stats = runner.response_cache.stats()
+    print(f"💾 OpenAI cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print(f"🔁 Retries: {runner.scheduler.retries}")
+    return 0 if not failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
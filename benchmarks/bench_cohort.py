@@ -0,0 +1,103 @@
+"""
+Cohort queries against an index of many analyzed users (no network)
+
+Personas are synthesized directly rather than analyzed, so building an
+index of this size takes seconds.
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from activity_index import SubredditActivity
+from benchmarks.synthetic import SUBREDDITS
+from config import INTEREST_KEYWORDS, PERSONALITY_INDICATORS
+from persona_result import PersonaResult
+
+INDEXED_USERS = 100_000
+
+# A long tail of niche subreddits next to the popular synthetic ones
+NICHE_SUBREDDITS = [f"niche{i}" for i in range(5000)]
+
+QUERY = ["r/personalfinance", "interest:Finance>=5", "personality:Analytical"]
+
+
+def make_results(count: int, seed: int = 0):
+    """Rule-based persona results with a realistic spread of terms"""
+    rng = random.Random(seed)
+    for i in range(count):
+        result = PersonaResult(username=f"cohort_user{i}", item_count=100)
+        result.subreddits = [SubredditActivity(subreddit, comments=rng.randint(1, 40))
+                             for subreddit in rng.sample(SUBREDDITS, 4) + rng.sample(NICHE_SUBREDDITS, 6)]
+        result.interests = {category: {"keyword": rng.randint(1, 20)}
+                            for category in rng.sample(list(INTEREST_KEYWORDS), 3)}
+        result.personality = {category: {"keyword": rng.randint(1, 20)}
+                              for category in rng.sample(list(PERSONALITY_INDICATORS), 2)}
+        yield result
+
+
+@pytest.fixture(scope="module")
+def cohort_index(tmp_path_factory):
+    from cohort_index import CohortIndex
+
+    index = CohortIndex(str(tmp_path_factory.mktemp("cohort") / "cohort_index.db"))
+    index.add_many(make_results(INDEXED_USERS))
+    index.compile()
+    yield index
+    index.close()
+
+
+def test_cohort_query(benchmark, cohort_index):
+    """Three-term cohort over the compiled sorted id arrays"""
+    size, usernames = benchmark(cohort_index.cohort, QUERY, 50)
+    assert size and len(usernames) == min(size, 50)
+
+
+def test_cohort_query_after_write(benchmark, cohort_index):
+    """A newly indexed persona forces its terms to be recompiled once"""
+    results = iter(make_results(1000, seed=1))
+
+    def query_after_write():
+        cohort_index.add(next(results))
+        return cohort_index.cohort(QUERY, 50)
+
+    size, _ = benchmark.pedantic(query_after_write, rounds=10)
+    assert size
+
+
+class OldSQLiteConnection(sqlite3.Connection):
+    """Connection rejecting the upsert and RETURNING syntax of SQLite 3.24+ and 3.35+"""
+
+    def execute(self, sql, *args):
+        if "RETURNING" in sql.upper() or "ON CONFLICT" in sql.upper():
+            raise sqlite3.OperationalError(f'near "{sql.split()[-1]}": syntax error')
+        return super().execute(sql, *args)
+
+
+def test_index_without_upsert(benchmark, tmp_path, monkeypatch):
+    """Indexing and re-indexing a user on a SQLite without upsert or RETURNING"""
+    import cohort_index as module
+
+    connect = sqlite3.connect
+    monkeypatch.setattr(module.sqlite3, 'connect', lambda *args, **kwargs: connect(
+        *args, factory=OldSQLiteConnection, **kwargs))
+    index = module.CohortIndex(str(tmp_path / "cohort_index.db"))
+    results = list(make_results(200))
+
+    def index_twice():
+        index.add_many(results)
+        return index.add_many(results)
+
+    assert benchmark.pedantic(index_twice, rounds=1) == len(results)
+    assert index.user_count() == len(results)
+    size, _ = index.cohort(QUERY)
+    assert size
+    index.close()
+
+
+def test_unknown_term_is_not_written(cohort_index):
+    """A query for a term the index has never seen leaves the database untouched"""
+    changes = cohort_index.conn.total_changes
+    assert cohort_index.cohort(["r/no_such_subreddit_anywhere"]) == (0, [])
+    assert cohort_index.conn.total_changes == changes
@@ -0,0 +1,105 @@
+"""
+End-to-end generate_persona latency against the fake Reddit and OpenAI
+servers, with and without injected latency and throttling
+"""
+
+import pytest
+
+from benchmarks.synthetic import PROFILES
+
+
+def profile_url(profile: str) -> str:
+    return f"https://www.reddit.com/user/{profile}_user/"
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_generate_persona_rules(benchmark, make_analyzer, profile):
+    analyzer = make_analyzer(openai=False)
+
+    persona = benchmark.pedantic(analyzer.generate_persona, args=(profile_url(profile),),
+                                 rounds=5, warmup_rounds=1)
+    assert "## Top Subreddits" in persona
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_generate_persona_openai(benchmark, make_analyzer, profile):
+    analyzer = make_analyzer()
+
+    persona = benchmark.pedantic(analyzer.generate_persona, args=(profile_url(profile),),
+                                 rounds=5, warmup_rounds=1)
+    assert "Overall Assessment" in persona
+
+
+@pytest.mark.parametrize("mode", ["single", "map_reduce", "sections"])
+def test_generate_persona_openai_latency(benchmark, make_analyzer, api_config, mode):
+    """200 ms per completion: map-reduce pays it once per level and sections once, thanks to their fan-out"""
+    api_config.openai_latency = 0.2
+    analyzer = make_analyzer(analysis_mode=mode)
+
+    persona = benchmark.pedantic(analyzer.generate_persona, args=(profile_url("power"),), rounds=3)
+    assert "Overall Assessment" in persona
+
+
+def test_generate_persona_throttled(benchmark, make_analyzer, api_config):
+    """Every 3rd completion and every 7th Reddit request is answered with 429"""
+    api_config.openai_429_every = 3
+    api_config.reddit_429_every = 7
+    analyzer = make_analyzer()
+    analyzer.scheduler.base_delay = 0.01
+
+    persona = benchmark.pedantic(analyzer.generate_persona, args=(profile_url("median"),), rounds=3)
+    assert "Overall Assessment" in persona
+
+
+def first_llm_chunk(analyzer, url: str) -> str:
+    """Run stream_result until the first OpenAI chunk after the header"""
+    events = analyzer.stream_result(url)
+    try:
+        texts = (value for event, value in events if event == 'text')
+        next(texts)
+        return next(texts)
+    finally:
+        events.close()
+
+
+def test_stream_first_chunk(benchmark, make_analyzer, api_config):
+    """Time to first persona text when streaming, with 5 ms between chunks"""
+    api_config.openai_chunk_latency = 0.005
+    analyzer = make_analyzer()
+
+    chunk = benchmark.pedantic(first_llm_chunk, args=(analyzer, profile_url("median")), rounds=5, warmup_rounds=1)
+    assert chunk
+
+
+def test_stream_complete(benchmark, make_analyzer, api_config):
+    """The same streamed persona consumed to the end"""
+    api_config.openai_chunk_latency = 0.005
+    analyzer = make_analyzer()
+
+    events = benchmark.pedantic(lambda: list(analyzer.stream_result(profile_url("median"))), rounds=5)
+    assert events[-1][1].analysis == "openai"
+
+
+def test_auto_mode_single_completion(benchmark, make_analyzer, fake_api):
+    """Auto mode sends one completion when the item cap, not the token budget, limits packing"""
+    analyzer = make_analyzer(analysis_mode="auto")
+
+    def generate():
+        before = fake_api.requests['openai']
+        return analyzer.generate_persona(profile_url("median")), fake_api.requests['openai'] - before
+
+    persona, completions = benchmark.pedantic(generate, rounds=3)
+    assert "Overall Assessment" in persona
+    assert analyzer.last_analysis_mode == "single"
+    assert completions == 1
+
+
+def test_auto_mode_map_reduce_over_budget(make_analyzer):
+    """A history that overflows the token budget below the item cap is map-reduced"""
+    from prompt_packer import PromptPacker
+
+    analyzer = make_analyzer(analysis_mode="auto")
+    analyzer.__dict__['prompt_packer'] = PromptPacker(token_budget=500)
+    persona = analyzer.generate_persona(profile_url("median"))
+    assert "Overall Assessment" in persona
+    assert analyzer.last_analysis_mode == "map_reduce"
@@ -0,0 +1,82 @@
+"""
+Watchlist refresh cost against the fake Reddit server
+
+A quiet watchlist should cost one probe request per user, and scraping and
+analysis only for the users with new activity.
+"""
+
+import pytest
+
+from benchmarks.conftest import UNLIMITED_RATE
+from benchmarks.synthetic import LATEST_UTC, make_history
+from models import RedditPost
+
+WATCHED_USERS = 40
+MIN_NEW_ITEMS = 5
+
+
+def new_activity(username: str, items: int):
+    """Comments newer than anything in the synthetic history"""
+    return [RedditPost(raw_title="", content=f"Fresh comment {i} about python and my workout routine",
+                       subreddit="python", score=1, created_utc=LATEST_UTC + 60 * (i + 1),
+                       permalink=f"/r/python/comments/{username}{i}/", post_type="comment",
+                       id=f"t1_{username}new{i}")
+            for i in reversed(range(items))]
+
+
+@pytest.fixture
+def refresh_runner(fake_api, make_analyzer, tmp_path, monkeypatch):
+    """Runner over a freshly profiled watchlist, and the watched usernames"""
+    from post_store import PostStore
+    from refresh import RefreshRunner, RefreshState
+
+    usernames = [f"watch{i}" for i in range(WATCHED_USERS)]
+    for username in usernames:
+        fake_api.add_user(username, make_history(username, 30))
+
+    store = PostStore(str(tmp_path / "posts.db"))
+    analyzer = make_analyzer(openai=False, store=store)
+    runner = RefreshRunner(RefreshState(str(tmp_path / "state.db")), store, min_new_items=MIN_NEW_ITEMS,
+                           workers=1, output_dir=str(tmp_path), rate_limit=UNLIMITED_RATE)
+    # Analyzers built by the runner would talk to the real Reddit
+    monkeypatch.setattr(runner, '_analyzer', lambda: analyzer)
+
+    assert runner.refresh(usernames) == {'regenerated': WATCHED_USERS}
+    return runner, usernames
+
+
+def test_refresh_unchanged(benchmark, fake_api, refresh_runner):
+    """Nobody posted: one probe per user, no scraping or analysis"""
+    runner, usernames = refresh_runner
+
+    def refresh():
+        before = fake_api.requests['reddit']
+        return runner.refresh(usernames), fake_api.requests['reddit'] - before
+
+    outcomes, requests = benchmark.pedantic(refresh, rounds=3)
+    assert outcomes == {'unchanged': WATCHED_USERS}
+    assert requests == WATCHED_USERS
+
+
+def test_refresh_new_activity(benchmark, fake_api, refresh_runner):
+    """A few users posted: only they are scraped, and regenerated above the threshold"""
+    runner, usernames = refresh_runner
+    for i, username in enumerate(usernames[:10]):
+        items = MIN_NEW_ITEMS if i < 5 else 1
+        fake_api.add_user(username, new_activity(username, items) + fake_api.users[username])
+
+    outcomes = benchmark.pedantic(runner.refresh, args=(usernames,), rounds=1)
+    assert outcomes == {'regenerated': 5, 'pending': 5, 'unchanged': WATCHED_USERS - 10}
+
+
+def test_refresh_retries_failed_regeneration(benchmark, fake_api, refresh_runner, monkeypatch):
+    """A regeneration that failed is retried on the next run without new activity"""
+    runner, usernames = refresh_runner
+    fake_api.add_user(usernames[0], new_activity(usernames[0], MIN_NEW_ITEMS) + fake_api.users[usernames[0]])
+    process = runner.process
+    monkeypatch.setattr(runner, 'process', lambda *args, **kwargs: (args[0], None, "disk full"))
+    assert runner.refresh(usernames[:1]) == {'failed': 1}
+    monkeypatch.setattr(runner, 'process', process)
+
+    outcomes = benchmark.pedantic(runner.refresh, args=(usernames[:1],), rounds=1)
+    assert outcomes == {'regenerated': 1}
@@ -0,0 +1,99 @@
+"""
+CPU cost of the rule-based analysis on synthetic histories (no network)
+"""
+
+import pytest
+
+from benchmarks.synthetic import LABELLED_INTERESTS, PROFILES, make_profile
+
+HISTORIES = {profile: make_profile(profile) for profile in PROFILES}
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_analyze_with_rules(benchmark, make_analyzer, profile):
+    analyzer = make_analyzer(openai=False)
+    history = HISTORIES[profile]
+
+    persona = benchmark(analyzer.analyze_with_rules, history, f"{profile}_user")
+    assert "## Top Subreddits" in persona
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_analyze_with_rules_embeddings(benchmark, make_analyzer, profile):
+    """Hashed TF-IDF embeddings scored against the category centroids"""
+    analyzer = make_analyzer(openai=False, rule_classifier="embeddings")
+    history = HISTORIES[profile]
+
+    persona = benchmark(analyzer.analyze_with_rules, history, f"{profile}_user")
+    assert "## Detected Interests" in persona
+
+
+def test_embedding_similarities(benchmark):
+    """One batch of posts: embedding plus the centroid matrix multiply"""
+    from config import AnalysisConfig
+    from embedding_classifier import get_default_classifier
+
+    classifier = get_default_classifier()
+    texts = [f"{post.title} {post.content}" for post in HISTORIES['power'][:AnalysisConfig.EMBEDDING_BATCH_SIZE]]
+    similarities = benchmark(classifier.similarities, texts)
+    assert similarities.shape == (len(texts), len(classifier.labels))
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_detect_interests(benchmark, profile):
+    from simple_analyzer import SimpleRedditAnalyzer
+
+    text = " ".join(f"{post.title} {post.content}" for post in HISTORIES[profile])
+    interests = benchmark(SimpleRedditAnalyzer().detect_interests, text)
+    assert interests
+
+
+def test_compute_activity_stats(benchmark):
+    from activity_stats import compute_activity_stats
+    from models import PostBatch
+
+    batch = PostBatch(HISTORIES['power'])
+    stats = benchmark(compute_activity_stats, batch)
+    assert stats.items == PROFILES['power']
+
+
+def test_prompt_packing(benchmark):
+    from prompt_packer import PromptPacker
+
+    packed = benchmark(PromptPacker().pack, HISTORIES['power'])
+    assert packed.items_used
+
+
+def test_deduplicate(benchmark):
+    """Exact hashes plus MinHash/LSH over a history with reposts"""
+    from dedup import Deduplicator
+
+    def deduplicate():
+        deduplicator = Deduplicator()
+        return list(deduplicator.filter(HISTORIES['power'])), deduplicator
+
+    kept, deduplicator = benchmark(deduplicate)
+    assert deduplicator.exact and deduplicator.near
+    assert len(kept) + deduplicator.removed == PROFILES['power']
+
+
+def test_interest_precision(benchmark):
+    """Per-post interest precision on labelled posts: embeddings beat keyword matching"""
+    from embedding_classifier import get_default_classifier
+    from keyword_matcher import get_default_matcher
+
+    texts = [text for text, _ in LABELLED_INTERESTS]
+    classifier = get_default_classifier()
+    columns = classifier.table_columns['interests']
+    categories = [category for _, category in classifier.labels[columns]]
+
+    def precision(predictions):
+        predicted = sum(len(categories) for categories in predictions)
+        correct = sum(label in categories for (_, label), categories in zip(LABELLED_INTERESTS, predictions))
+        return correct / predicted
+
+    supports = benchmark(classifier.supports, texts)[:, columns]
+    embedded = [{category for category, supported in zip(categories, row) if supported} for row in supports]
+    matcher = get_default_matcher()
+    keywords = [set(matcher.score(text)['interests']) for text in texts]
+    assert precision(embedded) > precision(keywords)
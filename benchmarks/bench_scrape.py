@@ -0,0 +1,71 @@
+"""
+Scraping throughput against the fake Reddit server: PRAW, the pooled
+standard-library listing fetcher and the aiohttp backend
+"""
+
+import pytest
+
+from benchmarks.synthetic import PROFILES
+from benchmarks.conftest import UNLIMITED_RATE
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_scrape_user_data(benchmark, make_analyzer, profile):
+    analyzer = make_analyzer(openai=False)
+    limit = PROFILES[profile]
+
+    posts = benchmark.pedantic(analyzer.scrape_user_data, args=(f"{profile}_user", limit),
+                               rounds=5, warmup_rounds=1)
+    assert len(posts) == limit
+
+
+def test_scrape_with_throttling(benchmark, make_analyzer, api_config):
+    """Every 5th Reddit request is answered with 429 and retried"""
+    api_config.reddit_429_every = 5
+    analyzer = make_analyzer(openai=False)
+    analyzer.scheduler.base_delay = 0.01
+
+    posts = benchmark.pedantic(analyzer.scrape_user_data, args=("power_user", 1000), rounds=3)
+    assert len(posts) == 1000
+    assert analyzer.scheduler.retries['reddit'] > 0
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_fetch_reddit_data(benchmark, fake_api, profile):
+    from listing_fetcher import ListingFetcher
+    from ratelimit import create_scheduler
+    from simple_analyzer import SimpleRedditAnalyzer
+
+    analyzer = SimpleRedditAnalyzer()
+    analyzer.fetcher = ListingFetcher(host=fake_api.host, port=fake_api.port, use_tls=False,
+                                      scheduler=create_scheduler(UNLIMITED_RATE, UNLIMITED_RATE))
+
+    data = benchmark.pedantic(analyzer.fetch_reddit_data, args=(f"{profile}_user",), rounds=5, warmup_rounds=1)
+    assert len(data['data']['children']) == PROFILES[profile]
+
+
+def test_async_scrape_users(benchmark, fake_api):
+    """All three synthetic users scraped concurrently over one connection pool"""
+    from async_scraper import scrape_users
+    from ratelimit import create_scheduler
+
+    users = [f"{profile}_user" for profile in PROFILES]
+    scheduler = create_scheduler(UNLIMITED_RATE, UNLIMITED_RATE)
+    results = benchmark.pedantic(scrape_users, args=(users,),
+                                 kwargs={'limit': 1000, 'base_url': fake_api.url, 'scheduler': scheduler},
+                                 rounds=5, warmup_rounds=1)
+    assert sum(len(batch) for batch in results.values()) == sum(PROFILES.values())
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_scrape_user_data_async_backend(benchmark, make_analyzer, profile):
+    """RedditUserAnalyzer with scrape_backend="async" pages both listings at once"""
+    analyzer = make_analyzer(openai=False, scrape_backend="async")
+    limit = PROFILES[profile]
+
+    posts = benchmark.pedantic(analyzer.scrape_user_data, args=(f"{profile}_user", limit),
+                               rounds=5, warmup_rounds=1)
+    assert len(posts) == limit
+    # Pages of the two listings interleave, so only the set of items is the same as PRAW's
+    praw_posts = make_analyzer(openai=False).scrape_user_data(f"{profile}_user", limit)
+    assert sorted(post.id for post in posts) == sorted(post.id for post in praw_posts)
@@ -0,0 +1,50 @@
+"""
+Service mode request coalescing against the fake Reddit/OpenAI server
+
+Concurrent requests for one user, streamed or not, should share a single
+generation: one scrape and one completion however many clients wait.
+"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def service(fake_api, monkeypatch):
+    """A two-worker PersonaService talking to the fake server"""
+    from llm_cache import ResponseCache
+    from server import PersonaService
+
+    for key, value in fake_api.analyzer_environment().items():
+        monkeypatch.setenv(key, value)
+    service = PersonaService(workers=2, praw_settings=fake_api.praw_settings())
+    for analyzer in service.analyzers.queue:
+        analyzer.response_cache = ResponseCache(max_entries=0)
+    yield service
+    service.close()
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+def test_concurrent_streams_share_generation(benchmark, fake_api, service):
+    """Two streams and a plain request for one user make one completion"""
+    from llm_cache import ResponseCache
+
+    async def clients():
+        service.results = ResponseCache(max_entries=16)
+        return await asyncio.gather(collect(service.stream("small_user")),
+                                    collect(service.stream("small_user")),
+                                    service.persona("small_user"))
+
+    def run():
+        before = fake_api.requests['openai']
+        return asyncio.run(clients()), fake_api.requests['openai'] - before
+
+    (first, second, payload), completions = benchmark.pedantic(run, rounds=3)
+    assert completions == 1
+    assert first == second
+    assert first[-1] == ('done', payload)
+    assert "".join(data['text'] for event, data in first if event == 'text') == payload['persona']
@@ -0,0 +1,56 @@
+"""
+Cold-start cost of the entry points, each round in a fresh interpreter
+
+Short-lived batch workers and cron-driven refreshes pay for imports and
+client setup on every run, so these are measured separately from the
+warm-analyzer benchmarks.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.conftest import UNLIMITED_RATE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints which heavy SDKs ended up imported
+HEAVY = ('praw', 'openai', 'numpy', 'tiktoken')
+LOADED = f"import json, sys; print(json.dumps({{m: m in sys.modules for m in {HEAVY!r}}}))"
+
+RULES_ONLY_REFRESH = """
+import main, ratelimit
+analyzer = main.RedditUserAnalyzer(praw_settings={settings!r}, rules_only=True,
+                                   scheduler=ratelimit.create_scheduler({rate!r}, {rate!r}))
+assert 'Top Subreddits' in analyzer.generate_persona('https://www.reddit.com/user/small_user/')
+"""
+
+
+def run_python(code: str, env=None) -> dict:
+    """Run code in a new interpreter and return the modules it loaded"""
+    output = subprocess.run([sys.executable, '-c', f"{code}\n{LOADED}"], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["main", "batch", "server"])
+def test_import_time(benchmark, module):
+    loaded = benchmark.pedantic(run_python, args=(f"import {module}",), rounds=5, warmup_rounds=1)
+    assert not any(loaded.values()), loaded
+
+
+def test_import_openai_baseline(benchmark):
+    """What every entry point used to pay up front"""
+    benchmark.pedantic(run_python, args=("import praw, openai",), rounds=5, warmup_rounds=1)
+
+
+def test_rules_only_refresh(benchmark, fake_api):
+    """A cron-style single-user run: start, scrape, analyze, exit"""
+    env = {**os.environ, **fake_api.analyzer_environment()}
+    code = RULES_ONLY_REFRESH.format(settings=fake_api.praw_settings(), rate=UNLIMITED_RATE)
+
+    loaded = benchmark.pedantic(run_python, args=(code, env), rounds=5, warmup_rounds=1)
+    assert loaded['praw'] and not loaded['openai']
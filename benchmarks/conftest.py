@@ -0,0 +1,53 @@
+"""
+Fixtures shared by the benchmarks: one fake API server for the session and
+analyzers wired to it with effectively unlimited rate limits, so the numbers
+measure this code rather than the configured API quotas.
+"""
+
+import pytest
+
+from benchmarks.fake_server import FakeAPIServer, FakeServerConfig
+from benchmarks.synthetic import PROFILES, make_profile
+
+# Requests per minute high enough that the token buckets never wait
+UNLIMITED_RATE = 1e9
+
+
+@pytest.fixture(scope="session")
+def fake_api():
+    """Fake Reddit/OpenAI server serving small_user, median_user and power_user"""
+    with FakeAPIServer(FakeServerConfig()) as server:
+        for profile in PROFILES:
+            server.add_user(f"{profile}_user", make_profile(profile))
+        yield server
+
+
+@pytest.fixture
+def api_config(fake_api):
+    """The server's latency/429 settings, restored after the test"""
+    saved = FakeServerConfig(**vars(fake_api.config))
+    yield fake_api.config
+    fake_api.config = saved
+
+
+@pytest.fixture
+def make_analyzer(fake_api, monkeypatch):
+    """Factory for RedditUserAnalyzer instances talking to the fake server
+
+    OpenAI responses are not cached unless a response_cache is passed, so
+    every round pays for its completions.
+    """
+    from llm_cache import ResponseCache
+    from main import RedditUserAnalyzer
+    from ratelimit import create_scheduler
+
+    def make(openai: bool = True, **kwargs):
+        for key, value in fake_api.analyzer_environment().items():
+            monkeypatch.setenv(key, value)
+        if not openai:
+            monkeypatch.delenv('OPENAI_API_KEY')
+        kwargs.setdefault('response_cache', ResponseCache(max_entries=0))
+        kwargs.setdefault('scheduler', create_scheduler(UNLIMITED_RATE, UNLIMITED_RATE))
+        return RedditUserAnalyzer(praw_settings=fake_api.praw_settings(), **kwargs)
+
+    return make
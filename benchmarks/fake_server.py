@@ -0,0 +1,282 @@
+"""
+Local stand-in for the Reddit and OpenAI APIs
+
+FakeAPIServer serves synthetic users over plain HTTP on localhost:
+
+- Reddit OAuth: POST /api/v1/access_token, GET /user/{name}/about
+- Listings: /user/{name}/submitted, /user/{name}/comments and the overview
+  (/user/{name}.json), paginated with Reddit's `after` cursor and gzipped
+  when the client accepts it
+- OpenAI: POST /v1/chat/completions with a canned persona (or persona
+  section) and token usage,
+  streamed word by word as server-sent events when the request asks for it
+
+Latency and HTTP 429 responses (with Retry-After) can be injected for each
+API, so retries and backoff can be benchmarked as well. RedditUserAnalyzer
+is pointed at it with `praw_settings()` and the environment from
+`analyzer_environment()` (credentials and OPENAI_BASE_URL).
+"""
+
+import gzip
+import json
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from models import RedditPost
+from prompts import PERSONA_SECTIONS
+
+from benchmarks.synthetic import listing_child
+
+# Sections mode asks for one section per completion
+SECTION_REQUEST = re.compile(r'section titled "([^"]+)"')
+
+USER_PATH = re.compile(r'^/user/([^/.]+)(?:/(about|submitted|comments|overview))?/?(?:\.json)?$')
+
+# Largest page the listing endpoints return
+MAX_PAGE = 100
+
+
+@dataclass
+class FakeServerConfig:
+    """Injected latency (seconds) and throttling for each API"""
+    reddit_latency: float = 0.0
+    openai_latency: float = 0.0
+    # Answer every Nth request with HTTP 429 (0 disables)
+    reddit_429_every: int = 0
+    openai_429_every: int = 0
+    retry_after: float = 0.0
+    # Streamed completions: pause between chunks, and drop the connection
+    # after this many chunks (0 disables)
+    openai_chunk_latency: float = 0.0
+    openai_stream_fail_after: int = 0
+
+
+def canned_persona(username: str) -> str:
+    """Markdown persona with every section the prompts ask for"""
+    return "\n\n".join(f"## {i}. {title}\nSynthetic evidence for u/{username}."
+                       for i, (title, _) in enumerate(PERSONA_SECTIONS, 1))
+
+
+class FakeAPIServer:
+    """Threaded fake Reddit + OpenAI server, usable as a context manager"""
+
+    def __init__(self, config: Optional[FakeServerConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or FakeServerConfig()
+        self.users: Dict[str, List[RedditPost]] = {}
+        self.requests: Dict[str, int] = {'reddit': 0, 'openai': 0}
+        self.throttled: Dict[str, int] = {'reddit': 0, 'openai': 0}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def host(self) -> str:
+        return self.httpd.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def add_user(self, username: str, history: List[RedditPost]):
+        """Serve a newest-first history for username"""
+        self.users[username] = history
+
+    def analyzer_environment(self) -> Dict[str, str]:
+        """Environment variables pointing RedditUserAnalyzer at this server"""
+        return {
+            'REDDIT_CLIENT_ID': 'bench',
+            'REDDIT_CLIENT_SECRET': 'bench',
+            'OPENAI_API_KEY': 'bench',
+            'OPENAI_BASE_URL': f"{self.url}/v1",
+        }
+
+    def praw_settings(self) -> Dict[str, str]:
+        """praw.Reddit settings sending PRAW's requests to this server"""
+        return {'oauth_url': self.url, 'reddit_url': self.url}
+
+    def start(self) -> 'FakeAPIServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-api", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'FakeAPIServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self, api: str) -> bool:
+        """Count a request; False when it should be answered with 429"""
+        every = self.config.reddit_429_every if api == 'reddit' else self.config.openai_429_every
+        with self.lock:
+            self.requests[api] += 1
+            throttle = bool(every) and self.requests[api] % every == 0
+            if throttle:
+                self.throttled[api] += 1
+        return not throttle
+
+    def listing(self, username: str, kind: str, params: Dict[str, str]) -> Dict:
+        """One page of a user listing, following the after cursor"""
+        history = self.users.get(username, [])
+        if kind == 'submitted':
+            history = [post for post in history if post.post_type == 'post']
+        elif kind == 'comments':
+            history = [post for post in history if post.post_type == 'comment']
+
+        start = 0
+        after = params.get('after')
+        if after:
+            start = next((i + 1 for i, post in enumerate(history) if post.id == after), len(history))
+        limit = min(int(params.get('limit', 25)), MAX_PAGE)
+        page = history[start:start + limit]
+        more = start + limit < len(history)
+        return {'kind': 'Listing', 'data': {
+            'after': page[-1].id if page and more else None,
+            'before': None,
+            'dist': len(page),
+            'children': [listing_child(post, username) for post in page],
+        }}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; avoid the Nagle/delayed-ACK stall
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, document, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(document).encode('utf-8')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers = {**(headers or {}), 'Content-Encoding': 'gzip'}
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _throttled(self):
+                self._send_json(429, {'error': {'message': 'Too Many Requests'}},
+                                {'Retry-After': f"{server.config.retry_after:g}"})
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def do_POST(self):
+                path = urllib.parse.urlparse(self.path).path
+                body = self._read_body()
+                if path == '/api/v1/access_token':
+                    self._send_json(200, {'access_token': 'bench', 'token_type': 'bearer',
+                                          'expires_in': 86400, 'scope': '*'})
+                elif path == '/v1/chat/completions':
+                    self._chat_completion(json.loads(body or b'{}'))
+                else:
+                    self._send_json(404, {'error': 404})
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                match = USER_PATH.match(parsed.path)
+                if not match:
+                    self._send_json(404, {'error': 404})
+                    return
+
+                time.sleep(server.config.reddit_latency)
+                if not server._admit('reddit'):
+                    self._throttled()
+                    return
+
+                username, kind = match.group(1), match.group(2) or 'overview'
+                if username not in server.users:
+                    self._send_json(404, {'message': 'Not Found', 'error': 404})
+                elif kind == 'about':
+                    self._send_json(200, {'kind': 't2', 'data': {
+                        'id': f"u{abs(hash(username)) % 10 ** 8}", 'name': username,
+                        'created_utc': 1_500_000_000.0, 'link_karma': 1, 'comment_karma': 1,
+                    }})
+                else:
+                    params = dict(urllib.parse.parse_qsl(parsed.query))
+                    self._send_json(200, server.listing(username, kind, params))
+
+            def _chat_completion(self, request: Dict):
+                time.sleep(server.config.openai_latency)
+                if not server._admit('openai'):
+                    self._throttled()
+                    return
+
+                prompt = " ".join(message.get('content', '') for message in request.get('messages', []))
+                username = re.search(r"user '([^']+)'", prompt)
+                username = username.group(1) if username else 'unknown'
+                section = SECTION_REQUEST.search(prompt)
+                if section:
+                    content = f"Synthetic {section.group(1).lower()} evidence for u/{username}."
+                else:
+                    content = canned_persona(username)
+                if request.get('stream'):
+                    self._stream_completion(request, prompt, content)
+                    return
+                self._send_json(200, {
+                    'id': 'chatcmpl-bench',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'gpt-3.5-turbo'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                              'total_tokens': (len(prompt) + len(content)) // 4},
+                })
+
+            def _write_chunk(self, data: bytes):
+                """One chunk of a chunked transfer-encoded body"""
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+            def _stream_completion(self, request: Dict, prompt: str, content: str):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def event(choices: List[Dict], usage: Optional[Dict] = None) -> bytes:
+                    chunk = {'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk',
+                             'created': int(time.time()), 'model': request.get('model', 'gpt-3.5-turbo'),
+                             'choices': choices, 'usage': usage}
+                    return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+                fail_after = server.config.openai_stream_fail_after
+                for i, word in enumerate(re.findall(r'\S+\s*', content)):
+                    if fail_after and i >= fail_after:
+                        # Abort without the terminating chunk, like a dropped connection
+                        self.close_connection = True
+                        return
+                    time.sleep(server.config.openai_chunk_latency)
+                    self._write_chunk(event([{'index': 0, 'delta': {'content': word}, 'finish_reason': None}]))
+
+                self._write_chunk(event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+                if (request.get('stream_options') or {}).get('include_usage'):
+                    self._write_chunk(event([], {'prompt_tokens': len(prompt) // 4,
+                                                 'completion_tokens': len(content) // 4,
+                                                 'total_tokens': (len(prompt) + len(content)) // 4}))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+        return Handler
@@ -0,0 +1,167 @@
+"""
+Synthetic Reddit users for benchmarks
+
+Histories are generated deterministically from a seed, with a realistic mix
+of subreddits, interest and personality keywords, score distribution and
+posting times, so every benchmark run analyzes exactly the same content.
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+from models import RedditPost
+
+# Items per profile: a light user, a typical active user and a power user
+PROFILES = {
+    'small': 20,
+    'median': 150,
+    'power': 1000,
+}
+
+SUBREDDITS = [
+    'python', 'programming', 'gaming', 'AskReddit', 'worldnews', 'fitness',
+    'cooking', 'personalfinance', 'movies', 'Music', 'science', 'travel',
+]
+
+PHRASES = [
+    "I've been learning python and javascript for my software job",
+    "Just finished a great workout at the gym, running tomorrow",
+    "This recipe turned out amazing, cooking is my favorite hobby",
+    "Honestly I think the economy and stock market are overrated",
+    "My kids and my wife love this movie, watched it twice",
+    "Playing video games on my playstation all weekend lol",
+    "As a college student I can't afford rent anymore",
+    "I feel anxious about work but happy with how things are going",
+    "Great point, thanks for sharing, I learned something new",
+    "Traveling to Japan next month, any tips for a first timer?",
+    "The new album is incredible, been listening to music all day",
+    "Science is fascinating, this research paper blew my mind",
+]
+
+# Newest item of every synthetic history
+LATEST_UTC = 1_700_000_000.0
+
+
+def make_history(username: str, items: int, seed: int = 0) -> List[RedditPost]:
+    """Generate a newest-first history of posts (about a third) and comments"""
+    rng = random.Random(f"{username}:{seed}")
+    favourites = rng.sample(SUBREDDITS, 4)
+    created = LATEST_UTC
+    history = []
+
+    for i in range(items):
+        # Sessions of rapid activity separated by longer breaks
+        created -= rng.expovariate(1 / 600) if rng.random() < 0.7 else rng.expovariate(1 / 86400)
+        subreddit = rng.choice(favourites) if rng.random() < 0.8 else rng.choice(SUBREDDITS)
+        is_post = rng.random() < 0.33
+        content = " ".join(rng.choice(PHRASES) for _ in range(rng.randint(1, 6)))
+        item_id = f"{username[:4]}{i:06x}"
+        history.append(RedditPost(
+            raw_title=rng.choice(PHRASES)[:60] if is_post else "",
+            content=content,
+            subreddit=subreddit,
+            score=int(rng.paretovariate(1.2)) - 1,
+            created_utc=round(created),
+            permalink=f"/r/{subreddit}/comments/{item_id}/",
+            post_type="post" if is_post else "comment",
+            id=f"{'t3' if is_post else 't1'}_{item_id}",
+        ))
+    return history
+
+
+def make_profile(profile: str, username: Optional[str] = None, seed: int = 0) -> List[RedditPost]:
+    """History for one of the PROFILES sizes"""
+    return make_history(username or f"{profile}_user", PROFILES[profile], seed)
+
+
+def listing_child(post: RedditPost, author: str) -> Dict[str, Any]:
+    """Reddit JSON listing child for a post, as served by the listing endpoints"""
+    kind, _, item_id = post.id.partition('_')
+    data = {
+        'id': item_id,
+        'name': post.id,
+        'author': author,
+        'subreddit': post.subreddit,
+        'score': post.score,
+        'created_utc': post.created_utc,
+        'permalink': post.permalink,
+    }
+    if post.post_type == "comment":
+        data.update(body=post.content, link_id=f"t3_{item_id}", link_title="", link_permalink=post.permalink)
+    else:
+        data.update(title=post.raw_title, selftext=post.content, is_self=True, url=post.url)
+    return {'kind': kind, 'data': data}
+
+
+# Hand-labelled posts and the interest each is about (None for none), for
+# measuring how precisely the rule-based classifiers detect interests
+LABELLED_INTERESTS = [
+    ("I have been programming in python for years and still love writing small scripts", "Technology"),
+    ("Our backend team finally moved the API to async handlers and latency dropped by half", "Technology"),
+    ("Does anyone know why my React component re-renders every time the parent updates?", "Technology"),
+    ("Switched from vim to vscode for javascript development, the debugger alone is worth it", "Technology"),
+    ("The new laptop compiles the whole codebase in two minutes, programmers rejoice", "Technology"),
+    ("Pushed my first open source library to github today, feedback on the code welcome", "Technology"),
+    ("Self-hosting a home server with docker containers has taught me so much about software", "Technology"),
+    ("Our ML pipeline spends more time cleaning data than training the models", "Technology"),
+    ("Finally beat the final boss after forty hours, what a game", "Gaming"),
+    ("Steam summer sale wiped out my wallet again, bought six RPGs I will never finish", "Gaming"),
+    ("Is the new console worth it or should I keep playing on my old PC?", "Gaming"),
+    ("Ranked matches in this FPS are full of cheaters since the last patch", "Gaming"),
+    ("Watching my favourite streamer speedrun Zelda on twitch every night", "Gaming"),
+    ("Nintendo really knows how to make a cozy co-op game for couples", "Gaming"),
+    ("Our raid guild in the MMO has been together for six years now", "Gaming"),
+    ("Anyone else think the xbox controller is more comfortable than the playstation one?", "Gaming"),
+    ("Hit a new deadlift personal record at the gym this morning", "Sports & Fitness"),
+    ("Training for my first marathon, up to thirty miles a week of running", "Sports & Fitness"),
+    ("What a goal in the last minute, the whole stadium lost it", "Sports & Fitness"),
+    ("Cutting carbs and doing three workouts a week, down fifteen pounds", "Sports & Fitness"),
+    ("The basketball playoffs this year have been incredible to watch", "Sports & Fitness"),
+    ("My soccer league plays every Sunday, we need a new goalkeeper", "Sports & Fitness"),
+    ("Stretching after every exercise session fixed my lower back pain", "Sports & Fitness"),
+    ("Our football team finally won the derby after ten years", "Sports & Fitness"),
+    ("Maxed out my 401k contribution this year and rebalanced the portfolio", "Finance"),
+    ("Is it smarter to pay off the car loan or put the money into index funds?", "Finance"),
+    ("Bitcoin dropped twenty percent overnight and my crypto savings went with it", "Finance"),
+    ("I track every expense in a spreadsheet to stick to my monthly budget", "Finance"),
+    ("Dividend stocks have been the backbone of my retirement plan", "Finance"),
+    ("Day trading options is basically gambling with extra steps", "Finance"),
+    ("Opened a high yield savings account for my emergency fund", "Finance"),
+    ("Investing ten percent of every paycheck since I started working", "Finance"),
+    ("Failed my organic chemistry exam and now I have to retake the course", "Education"),
+    ("Applying to graduate school, how many universities should I apply to?", "Education"),
+    ("My professor posts the lecture slides the night before every exam", "Education"),
+    ("Studying for finals in the library until three in the morning", "Education"),
+    ("Finished my degree online while working full time, it took five years", "Education"),
+    ("Our school district is cutting the music program to save money", "Education"),
+    ("The student loans for this college degree will take me a decade to repay", "Education"),
+    ("Any tips for writing a thesis without losing my mind?", "Education"),
+    ("Finished my first oil painting of the lake behind my house", "Arts & Creativity"),
+    ("Learning guitar at thirty, my fingers hurt but the songs sound better every week", "Arts & Creativity"),
+    ("Sketching people on the train every morning has improved my drawing a lot", "Arts & Creativity"),
+    ("The cinematography in this film is breathtaking, every frame is a painting", "Arts & Creativity"),
+    ("Writing poetry again after years, sharing a short poem about winter", "Arts & Creativity"),
+    ("Shot the whole wedding on a film camera, the photographs look timeless", "Arts & Creativity"),
+    ("Our band is recording an album in my garage this summer", "Arts & Creativity"),
+    ("Reading Dostoevsky made me fall in love with Russian literature", "Arts & Creativity"),
+    ("The James Webb telescope images of distant galaxies are unbelievable", "Science"),
+    ("New physics paper claims evidence for a fifth fundamental force", "Science"),
+    ("Biology fact of the day: octopuses have three hearts and blue blood", "Science"),
+    ("Researchers sequenced the genome of a plant that survived the ice age", "Science"),
+    ("The chemistry behind why onions make you cry is surprisingly elegant", "Science"),
+    ("Watched the rocket launch live, the booster landing never gets old", "Science"),
+    ("Quantum entanglement explained without the usual hand waving", "Science"),
+    ("Climate models have been remarkably accurate since the eighties", "Science"),
+    ("Made lasagna from scratch for the first time and it was a hit", None),
+    ("My cat knocked every plant off the windowsill again", None),
+    ("Traffic on the highway this morning was absolutely brutal", None),
+    ("What is the best way to get red wine out of a carpet?", None),
+    ("Visiting my grandparents this weekend, they live by the sea", None),
+    ("The new coffee place downtown makes the best croissants", None),
+    ("Anyone else find small talk at parties exhausting?", None),
+    ("Our landlord finally fixed the heating after three weeks", None),
+    ("I team up with my neighbour to walk our dogs every morning", None),
+    ("Thanks for the advice, the rash cleared up after a week", None),
+    ("My daughter lost her first tooth today and wants money from the tooth fairy", None),
+    ("This thread made my day, thanks for sharing", None),
+]
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Persistent inverted index of analyzed users for cohort queries
+
+Every indexed persona adds one posting per term it exhibits: a subreddit
+the user is active in, a detected interest, personality indicator or age
+group, each with a count (items in the subreddit, hits or supporting posts
+of the category). Postings live in SQLite keyed by (term, user id), so a
+re-analyzed user simply replaces their rows. For queries each term is
+compiled once into a sorted array of user ids plus their counts, stored as
+a blob next to the postings; writes drop the compiled arrays of the terms
+they touch. A cohort is then the intersection of a few sorted arrays,
+which takes milliseconds over hundreds of thousands of users and never
+re-reads persona files.
+
+Usage:
+    python cohort_index.py build personas.jsonl personas/
+    python cohort_index.py query r/personalfinance "interest:Finance>=5" personality:analytical
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import CacheConfig
+from persona_result import PersonaResult, iter_jsonl
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    generated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_user ON postings (user_id);
+CREATE TABLE IF NOT EXISTS segments (
+    term TEXT PRIMARY KEY,
+    ids BLOB NOT NULL,
+    counts BLOB NOT NULL
+);
+"""
+
+# Term kinds and the PersonaResult field each category kind comes from
+CATEGORY_KINDS = {
+    'interest': 'interests',
+    'personality': 'personality',
+    'age': 'age_group',
+}
+KINDS = ('subreddit',) + tuple(CATEGORY_KINDS)
+
+# "r/python", "subreddit:python>=10", "interest:Finance>=5"
+TERM_PATTERN = re.compile(r'^\s*(?:(?P<kind>[a-z]+):|r/)(?P<name>.+?)(?:\s*>=\s*(?P<min>\d+))?\s*$', re.IGNORECASE)
+
+# SQLite's default limit on bound parameters per statement is 999
+LOOKUP_CHUNK = 900
+
+
+def make_term(kind: str, name: str) -> str:
+    """Index key of a subreddit or category; names are case-insensitive"""
+    return f"{kind}:{name.strip().lower()}"
+
+
+def parse_term(text: str) -> Tuple[str, int]:
+    """Parse a query term into (term, minimum count)"""
+    match = TERM_PATTERN.match(text)
+    kind = (match.group('kind') or 'subreddit').lower() if match else None
+    if kind not in KINDS:
+        raise ValueError(f"Invalid cohort term {text!r}: use r/NAME or "
+                         f"{'|'.join(KINDS)}:NAME, optionally followed by >=COUNT")
+    name = match.group('name')
+    if kind == 'subreddit' and name.lower().startswith('r/'):
+        name = name[2:]
+    return make_term(kind, name), int(match.group('min') or 1)
+
+
+def result_terms(result: PersonaResult) -> Dict[str, int]:
+    """Terms a persona exhibits with their counts"""
+    terms = {make_term('subreddit', activity.subreddit): activity.items for activity in result.subreddits}
+    for kind, field_name in CATEGORY_KINDS.items():
+        for category, evidence in getattr(result, field_name).items():
+            terms[make_term(kind, category)] = sum(evidence.values())
+    return terms
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted, duplicate-free id arrays
+
+    Binary-searches the shorter array in the longer one, so the cost is
+    O(short * log(long)) rather than a sort of both.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[positions] == a]
+
+
+class CohortIndex:
+    """SQLite-backed inverted index from terms to sorted user id arrays"""
+
+    def __init__(self, path: str = CacheConfig.COHORT_INDEX_PATH, timeout: float = 60.0):
+        """Open or create the index; timeout is how long to wait for other writers"""
+        self.path = path
+        # One connection shared by batch worker threads, serialized by a lock
+        self.conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def add(self, result: PersonaResult):
+        """Index one persona, replacing an earlier one of the same user"""
+        self.add_many([result])
+
+    def try_add(self, result: PersonaResult) -> bool:
+        """Index one persona, reporting rather than raising database errors
+
+        Used where a persona has already been generated and saved, so a
+        locked or broken index must not fail the request or the batch.
+        """
+        try:
+            self.add(result)
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not index u/{result.username} for cohort queries: {e}")
+            return False
+
+    def add_many(self, results: Iterable[PersonaResult]) -> int:
+        """Index personas in one transaction and return how many were indexed"""
+        indexed = 0
+        touched = set()
+        with self.lock, self.conn:
+            for result in results:
+                if not result.item_count:
+                    continue
+                # Upserts and RETURNING need newer SQLite versions than many systems ship
+                self.conn.execute("INSERT OR IGNORE INTO users (username, generated_at) VALUES (?, ?)",
+                                  (result.username, result.generated_at))
+                user_id, generated_at = self.conn.execute(
+                    "SELECT id, generated_at FROM users WHERE username = ?", (result.username,)
+                ).fetchone()
+                if generated_at != result.generated_at:
+                    self.conn.execute("UPDATE users SET generated_at = ? WHERE id = ?",
+                                      (result.generated_at, user_id))
+
+                terms = result_terms(result)
+                stale = {term for term, in self.conn.execute(
+                    "SELECT term FROM postings WHERE user_id = ?", (user_id,))}
+                self.conn.execute("DELETE FROM postings WHERE user_id = ?", (user_id,))
+                self.conn.executemany("INSERT INTO postings (term, user_id, count) VALUES (?, ?, ?)",
+                                      [(term, user_id, count) for term, count in terms.items()])
+                touched.update(stale, terms)
+                indexed += 1
+            self.conn.executemany("DELETE FROM segments WHERE term = ?", [(term,) for term in touched])
+        return indexed
+
+    def _compile(self, term: str) -> Tuple[bytes, bytes]:
+        """Build and store the sorted arrays of a term; call inside a write transaction"""
+        rows = self.conn.execute(
+            "SELECT user_id, count FROM postings WHERE term = ? ORDER BY user_id", (term,)
+        ).fetchall()
+        pairs = np.array(rows, dtype=np.uint32).reshape(-1, 2)
+        segment = (pairs[:, 0].tobytes(), pairs[:, 1].tobytes())
+        self.conn.execute("INSERT OR REPLACE INTO segments (term, ids, counts) VALUES (?, ?, ?)",
+                          (term, *segment))
+        return segment
+
+    def posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted user ids having term, and their counts
+
+        Compiles the term from its postings when a write has dropped it.
+        Terms without postings are empty, and nothing is written for them.
+        """
+        with self.lock:
+            segment = self.conn.execute("SELECT ids, counts FROM segments WHERE term = ?", (term,)).fetchone()
+            if segment is None:
+                if self.conn.execute("SELECT 1 FROM postings WHERE term = ? LIMIT 1", (term,)).fetchone() is None:
+                    return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32)
+                with self.conn:
+                    # Block other writers so the compiled arrays match the postings
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    segment = self._compile(term)
+        return np.frombuffer(segment[0], dtype=np.uint32), np.frombuffer(segment[1], dtype=np.uint32)
+
+    def query(self, terms: Sequence[Tuple[str, int]]) -> np.ndarray:
+        """Sorted ids of the users having every term with at least its minimum count"""
+        postings = []
+        for term, min_count in terms:
+            ids, counts = self.posting(term)
+            postings.append(ids[counts >= min_count] if min_count > 1 else ids)
+        if not postings:
+            return np.zeros(0, dtype=np.uint32)
+
+        # Smallest first, so every intersection is at most that size
+        postings.sort(key=len)
+        cohort = postings[0]
+        for ids in postings[1:]:
+            if not len(cohort):
+                break
+            cohort = intersect_sorted(cohort, ids)
+        return cohort
+
+    def usernames(self, user_ids: Sequence[int]) -> List[str]:
+        """Usernames of user ids, in the same order"""
+        names: Dict[int, str] = {}
+        ids = [int(user_id) for user_id in user_ids]
+        with self.lock:
+            for start in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[start:start + LOOKUP_CHUNK]
+                names.update(self.conn.execute(
+                    f"SELECT id, username FROM users WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return [names[user_id] for user_id in ids if user_id in names]
+
+    def cohort(self, terms: Sequence[str], limit: Optional[int] = None) -> Tuple[int, List[str]]:
+        """Parse query terms and return (cohort size, up to limit usernames)"""
+        ids = self.query([parse_term(term) for term in terms])
+        return len(ids), self.usernames(ids[:limit])
+
+    def user_count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def compile(self) -> int:
+        """Compile every term a write has dropped and return how many there were"""
+        with self.lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            stale = [term for term, in self.conn.execute(
+                "SELECT DISTINCT term FROM postings WHERE term NOT IN (SELECT term FROM segments)")]
+            for term in stale:
+                self._compile(term)
+        return len(stale)
+
+    def close(self):
+        """Close the underlying database connection"""
+        self.conn.close()
+
+
+def iter_results(paths: Iterable[str]) -> Iterator[PersonaResult]:
+    """Load personas from JSONL files, persona JSON files and directories of them"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                yield from iter_results(os.path.join(root, name) for name in sorted(files)
+                                        if name.endswith(('_persona.json', '.jsonl')))
+        elif path.endswith('.jsonl'):
+            yield from iter_jsonl(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                yield PersonaResult.from_json(f.read())
+
+
+def main(argv=None):
+    """Command line entry point for building and querying the cohort index"""
+    parser = argparse.ArgumentParser(description="Index analyzed users and query cohorts")
+    parser.add_argument('--index', default=CacheConfig.COHORT_INDEX_PATH, help="SQLite index file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="index stored personas")
+    build.add_argument('paths', nargs='+',
+                       help="JSONL files, {username}_persona.json files or directories of them")
+    query = commands.add_parser('query', help="list the users matching every term")
+    query.add_argument('terms', nargs='+', metavar='TERM',
+                       help="r/NAME or subreddit|interest|personality|age:NAME, optionally >=COUNT")
+    query.add_argument('--limit', type=int, default=50, help="usernames to print (default: 50)")
+    args = parser.parse_args(argv)
+
+    index = CohortIndex(args.index)
+    try:
+        if args.command == 'build':
+            indexed = index.add_many(iter_results(args.paths))
+            index.compile()
+            print(f"🗂️  Indexed {indexed} personas ({index.user_count()} users in {args.index})")
+            return 0
+
+        try:
+            size, usernames = index.cohort(args.terms, args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"👥 {size} users match {' AND '.join(args.terms)}")
+        for username in usernames:
+            print(f"   u/{username}")
+        if size > len(usernames):
+            print(f"   ... and {size - len(usernames)} more")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,9 +15,18 @@ class AnalysisConfig:
     # Number of posts/comments to analyze per user
     MAX_POSTS_TO_ANALYZE = 100
     
-    # Number of posts to send to OpenAI (to avoid token limits)
+    # Maximum number of posts to send to OpenAI
     OPENAI_ANALYSIS_LIMIT = 50
     
+    # Token budget for the Reddit content packed into the OpenAI prompt
+    OPENAI_PROMPT_TOKEN_BUDGET = 6000
+    
+    # Character limit for each post or comment sent to OpenAI
+    OPENAI_ITEM_CHAR_LIMIT = 500
+    
+    # Listing pages of 100 items fetched by the dependency-free analyzer
+    SIMPLE_MAX_PAGES = 10
+    
     # Character limit for content preview in rule-based analysis
     CONTENT_PREVIEW_LIMIT = 200
     
@@ -28,6 +37,57 @@ class AnalysisConfig:
     OPENAI_MODEL = "gpt-3.5-turbo"  # Change to "gpt-4" for better analysis
     OPENAI_MAX_TOKENS = 2000
     OPENAI_TEMPERATURE = 0.7
+    
+    # OpenAI analysis mode: "single" sends one packed prompt, "map_reduce"
+    # summarizes the whole history in chunks, "sections" writes every persona
+    # section with its own concurrent completion, "auto" uses map_reduce only
+    # when the packed items run out of token budget before the item cap
+    OPENAI_ANALYSIS_MODE = "auto"
+    
+    # Map-reduce: concurrent chunk summaries, tokens per chunk and per summary
+    MAP_REDUCE_FAN_OUT = 8
+    MAP_REDUCE_CHUNK_TOKENS = 3000
+    MAP_REDUCE_MAP_MAX_TOKENS = 400
+    
+    # Sections mode: concurrent section completions and tokens per section
+    SECTION_FAN_OUT = 8
+    SECTION_MAX_TOKENS = 400
+    
+    # Rule-based category detection: "keywords" matches the keyword tables
+    # below, "embeddings" scores posts against embedded category centroids
+    RULE_CLASSIFIER = "keywords"
+    
+    # Local sentence-transformers model for "embeddings" (e.g.
+    # "all-MiniLM-L6-v2"); None uses hashed TF-IDF vectors
+    EMBEDDING_MODEL = None
+    EMBEDDING_BATCH_SIZE = 256
+    EMBEDDING_DIM = 8192  # hashed TF-IDF dimensions
+    
+    # Cosine similarity at which a post supports a category. The hashing
+    # threshold is calibrated on the labelled posts in benchmarks/synthetic.py
+    EMBEDDING_MIN_SIMILARITY = 0.3
+    HASHING_MIN_SIMILARITY = 0.1
+    
+    # A post supports only the best category of each table, and any other
+    # within this similarity of it
+    EMBEDDING_CATEGORY_MARGIN = 0.02
+    
+    # Supporting posts a category needs: at least EMBEDDING_MIN_POSTS and
+    # EMBEDDING_MIN_POST_SHARE of the user's posts
+    EMBEDDING_MIN_POSTS = 2
+    EMBEDDING_MIN_POST_SHARE = 0.05
+    
+    # Drop reposted and near-identical items before analysis
+    DEDUP_ENABLED = True
+    
+    # Estimated Jaccard similarity of word 3-gram shingles at which an item
+    # is a near-duplicate; shorter items than DEDUP_MIN_WORDS are never dropped
+    DEDUP_SIMILARITY = 0.8
+    DEDUP_MIN_WORDS = 8
+    
+    # MinHash signature length and LSH bands (num_perm / bands rows per band)
+    DEDUP_NUM_PERM = 64
+    DEDUP_BANDS = 16
 
 # Interest Detection Keywords
 INTEREST_KEYWORDS: Dict[str, List[str]] = {
@@ -128,6 +188,9 @@ class APIConfig:
     # Reddit API rate limiting (requests per minute)
     REDDIT_RATE_LIMIT = 60
     
+    # OpenAI API rate limiting (requests per minute)
+    OPENAI_RATE_LIMIT = 500
+    
     # OpenAI API timeout (seconds)
     OPENAI_TIMEOUT = 30
     
@@ -136,6 +199,71 @@ class APIConfig:
     
     # Wait time between retries (seconds)
     RETRY_WAIT_TIME = 5
+    
+    # How user histories are scraped: "praw" pages the listings one after the
+    # other, "async" pages both at once over aiohttp (async_scraper.py)
+    REDDIT_SCRAPE_BACKEND = "praw"
+
+# Cache Configuration
+class CacheConfig:
+    """Configuration for on-disk and in-memory caches"""
+    
+    # SQLite file holding scraped posts and comments for incremental refresh
+    POST_STORE_PATH = "reddit_posts.db"
+    
+    # OpenAI response cache: entry limit, time-to-live (seconds) and save file
+    LLM_CACHE_MAX_ENTRIES = 1024
+    LLM_CACHE_TTL = 7 * 24 * 3600
+    LLM_CACHE_PATH = "openai_cache.json"
+    
+    # SQLite inverted index of analyzed users for cohort queries (cohort_index.py)
+    COHORT_INDEX_PATH = "cohort_index.db"
+
+# Instrumentation Configuration
+class InstrumentationConfig:
+    """Configuration for stage metrics and structured logs"""
+    
+    # JSON-lines stage log ('-' for stderr, None to disable)
+    METRICS_LOG_PATH = None
+    
+    # Prometheus text file rewritten after each persona (None to disable)
+    PROMETHEUS_FILE = None
+    
+    # Port of the /metrics HTTP endpoint (None to disable)
+    PROMETHEUS_PORT = None
+
+# Service Mode Configuration
+class ServerConfig:
+    """Configuration for the long-running HTTP service (server.py)"""
+    
+    HOST = "127.0.0.1"
+    PORT = 8000
+    
+    # Warm analyzers, i.e. personas generated concurrently
+    WORKERS = 4
+    
+    # Finished personas are served from memory for this many seconds
+    RESULT_CACHE_TTL = 600
+    RESULT_CACHE_MAX_ENTRIES = 1000
+    
+    # Access-Control-Allow-Origin sent to the web front end
+    CORS_ORIGIN = "*"
+
+# Watchlist Refresh Configuration
+class RefreshConfig:
+    """Configuration for scheduled re-profiling of a watchlist (refresh.py)"""
+    
+    # SQLite file with each watched user's newest item, pending new items and activity rate
+    STATE_PATH = "refresh_state.db"
+    
+    # New posts and comments since the last persona needed to regenerate it
+    MIN_NEW_ITEMS = 5
+    
+    # Days of cached history the activity rate (items per day) is measured over
+    ACTIVITY_WINDOW_DAYS = 30
+    
+    # Users probed concurrently (requests still share the Reddit rate limit)
+    WORKERS = 4
 
 # Environment variable names
 ENV_VARS = {
@@ -0,0 +1,107 @@
+"""
+Exact and near-duplicate filtering of scraped content
+
+Reposts across subreddits and bot boilerplate inflate keyword counts and
+waste prompt tokens. Deduplicator sits between scraping and analysis and
+drops an item when its normalized text hashes to one already seen (exact),
+or when its MinHash signature over word shingles collides with an earlier
+item in an LSH band and the estimated Jaccard similarity reaches the
+threshold (near). The first (newest) copy is kept. Only hashes and
+signatures are retained, so it works on a stream of posts.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, List, Set
+
+import numpy as np
+
+from config import AnalysisConfig
+from models import RedditPost
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Prime above 2**32 for the universal hash family (a * x + b) % PRIME
+PRIME = np.uint64(4294967311)
+
+
+class Deduplicator:
+    """Streaming exact and MinHash/LSH near-duplicate filter"""
+
+    def __init__(self, threshold: float = AnalysisConfig.DEDUP_SIMILARITY,
+                 num_perm: int = AnalysisConfig.DEDUP_NUM_PERM,
+                 bands: int = AnalysisConfig.DEDUP_BANDS,
+                 min_words: int = AnalysisConfig.DEDUP_MIN_WORDS,
+                 seed: int = 1):
+        """Items with fewer than min_words words are always kept"""
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_words = max(min_words, SHINGLE_SIZE)
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+
+        self.hashes: Set[bytes] = set()
+        self.signatures: List[np.ndarray] = []
+        # One table per band: band bytes -> indices into signatures
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.kept = 0
+        self.exact = 0
+        self.near = 0
+
+    @property
+    def removed(self) -> int:
+        return self.exact + self.near
+
+    def signature(self, words: List[str]) -> np.ndarray:
+        """MinHash signature of the word shingles"""
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+        values = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((values[:, None] * self.a + self.b) % PRIME).min(axis=0)
+
+    def _near_duplicate(self, signature: np.ndarray) -> bool:
+        """Check LSH candidates and register the signature if it is new"""
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        candidates = {index for band, key in enumerate(keys) for index in self.buckets[band].get(key, ())}
+        for index in candidates:
+            if np.mean(self.signatures[index] == signature) >= self.threshold:
+                return True
+
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in enumerate(keys):
+            self.buckets[band].setdefault(key, []).append(index)
+        return False
+
+    def is_duplicate(self, post: RedditPost) -> bool:
+        """Return True if post repeats an earlier item, remembering it otherwise"""
+        words = TOKEN.findall(f"{post.raw_title} {post.content}".lower())
+        if len(words) < self.min_words:
+            self.kept += 1
+            return False
+
+        digest = hashlib.blake2b(" ".join(words).encode('utf-8'), digest_size=16).digest()
+        if digest in self.hashes:
+            self.exact += 1
+            return True
+        self.hashes.add(digest)
+
+        if self._near_duplicate(self.signature(words)):
+            self.near += 1
+            return True
+        self.kept += 1
+        return False
+
+    def filter(self, posts: Iterable[RedditPost]) -> Iterator[RedditPost]:
+        """Yield the posts that are not duplicates of an earlier one"""
+        for post in posts:
+            if not self.is_duplicate(post):
+                yield post
@@ -0,0 +1,295 @@
+"""
+Embedding-based interest, personality and age classification
+
+A middle tier between the keyword matcher and the OpenAI analysis. Every
+category of the keyword tables in config.py becomes a centroid (the
+normalized mean embedding of its keywords), and the centroids of all tables
+are stacked into one matrix once per process. Classifying a batch of posts
+is then a single (posts x dim) @ (dim x categories) product of their
+embeddings with that matrix. Within each table a post supports its most
+similar category (and any other within a small margin of it), provided it
+is similar enough, so a post about programming is not also counted as art.
+
+Posts are embedded with a local sentence-transformers model when
+AnalysisConfig.EMBEDDING_MODEL names one and the package is installed.
+Otherwise a hashed TF-IDF of words and character n-grams is used, which
+needs nothing beyond NumPy and still matches the inflections and compounds
+the keyword regex misses ("programmer", "workouts", "investing").
+"""
+
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import AGE_INDICATORS, INTEREST_KEYWORDS, PERSONALITY_INDICATORS, AnalysisConfig
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Character n-gram lengths taken from each word, fastText style
+NGRAM_SIZES = (3, 4, 5)
+
+# Function words carry no topic and would only dilute the hashed vectors
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by can could did do
+does doing don for from had has have having he her here him his how i if in into is it its
+just me more most my no not now of on once only or other our out over own same she should
+so some such than that the their them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your
+""".split())
+
+
+class HashingEmbedder:
+    """Hashed TF-IDF vectors of words and their character n-grams"""
+
+    name = "hashing"
+
+    # Words whose features are remembered before the vocabulary is reset
+    MAX_VOCABULARY = 1 << 18
+
+    def __init__(self, dim: int = AnalysisConfig.EMBEDDING_DIM,
+                 min_similarity: float = AnalysisConfig.HASHING_MIN_SIMILARITY):
+        self.dim = dim
+        self.min_similarity = min_similarity
+        self.idf = np.ones(dim, dtype=np.float32)
+        # Guards the vocabulary, which threads sharing the embedder extend
+        self.lock = threading.Lock()
+        self._reset_vocabulary()
+
+    def _reset_vocabulary(self):
+        # Word -> id; the features of word i are flat[offsets[i]:offsets[i] + lengths[i]].
+        # Id 0 is unused (so ids are truthy) and stopwords share id 1, which has none.
+        self.vocabulary: Dict[str, int] = dict.fromkeys(STOPWORDS, 1)
+        self.offsets = np.zeros(2, dtype=np.int64)
+        self.lengths = np.zeros(2, dtype=np.int64)
+        self.flat_indices = np.zeros(0, dtype=np.int64)
+        self.flat_weights = np.zeros(0, dtype=np.float32)
+        self._pending: List[Tuple[List[int], List[float]]] = []
+
+    def _add_word(self, word: str) -> int:
+        """Register a new word and return its id
+
+        The n-grams together weigh about as much as the word itself, so
+        words with a common stem are similar without being identical.
+        """
+        marked = f"<{word}>"
+        ngrams = [marked[i:i + n] for n in NGRAM_SIZES for i in range(len(marked) - n + 1)]
+        indices = [zlib.crc32(word.encode('utf-8')) % self.dim]
+        indices += [zlib.crc32(ngram.encode('utf-8')) % self.dim for ngram in ngrams]
+        weights = [1.0] + [len(ngrams) ** -0.5] * len(ngrams)
+        self._pending.append((indices, weights))
+        word_id = self.vocabulary[word] = len(self.lengths) + len(self._pending) - 1
+        return word_id
+
+    def _commit_words(self):
+        """Append the features of newly registered words to the flat arrays"""
+        if not self._pending:
+            return
+        lengths = np.array([len(indices) for indices, _ in self._pending], dtype=np.int64)
+        offsets = len(self.flat_indices) + np.cumsum(lengths) - lengths
+        self.offsets = np.concatenate([self.offsets, offsets])
+        self.lengths = np.concatenate([self.lengths, lengths])
+        self.flat_indices = np.concatenate([self.flat_indices] + [np.array(i, dtype=np.int64) for i, _ in self._pending])
+        self.flat_weights = np.concatenate([self.flat_weights] + [np.array(w, dtype=np.float32) for _, w in self._pending])
+        self._pending.clear()
+
+    def _term_frequencies(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts x dim) matrix of hashed feature counts"""
+        word_ids: List[int] = []
+        words_per_text = []
+        with self.lock:
+            if len(self.vocabulary) > self.MAX_VOCABULARY:
+                self._reset_vocabulary()
+            vocabulary = self.vocabulary
+            for text in texts:
+                ids = [vocabulary.get(word) or self._add_word(word) for word in TOKEN.findall(text.lower())]
+                word_ids.extend(ids)
+                words_per_text.append(len(ids))
+            self._commit_words()
+            # The arrays are replaced, never modified, so this snapshot stays valid
+            offsets, all_lengths = self.offsets, self.lengths
+            flat_indices, flat_weights = self.flat_indices, self.flat_weights
+
+        # Expand every word into its features with flat array indexing
+        ids = np.array(word_ids, dtype=np.int64)
+        lengths = all_lengths[ids]
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1] if len(ends) else 0) + np.repeat(offsets[ids] - ends + lengths, lengths)
+        rows = np.repeat(np.repeat(np.arange(len(texts)), words_per_text), lengths)
+        counts = np.bincount(rows * self.dim + flat_indices[positions], flat_weights[positions],
+                             minlength=len(texts) * self.dim)
+        return counts.reshape(len(texts), self.dim).astype(np.float32)
+
+    def fit_idf(self, documents: Sequence[str]):
+        """Weight features by their inverse document frequency in documents"""
+        present = self._term_frequencies(documents) > 0
+        df = present.sum(axis=0)
+        self.idf = (np.log((1 + len(documents)) / (1 + df)) + 1).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """L2-normalized (texts x dim) embeddings"""
+        vectors = np.log1p(self._term_frequencies(texts)) * self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceEmbedder:
+    """Local sentence-transformers model running on the CPU"""
+
+    def __init__(self, model_name: str, batch_size: int = AnalysisConfig.EMBEDDING_BATCH_SIZE,
+                 min_similarity: float = AnalysisConfig.EMBEDDING_MIN_SIMILARITY):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.batch_size = batch_size
+        self.min_similarity = min_similarity
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    def fit_idf(self, documents: Sequence[str]):
+        """Dense models need no corpus statistics"""
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """L2-normalized (texts x dim) embeddings"""
+        return self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True).astype(np.float32)
+
+
+class EmbeddingClassifier:
+    """Category centroids of several keyword tables in one matrix"""
+
+    def __init__(self, embedder, tables: Dict[str, Dict[str, List[str]]],
+                 margin: float = AnalysisConfig.EMBEDDING_CATEGORY_MARGIN):
+        """Build the centroid matrix from {table: {category: [keywords]}}"""
+        self.embedder = embedder
+        self.margin = margin
+        self.labels: List[Tuple[str, str]] = [(table, category)
+                                              for table, categories in tables.items()
+                                              for category in categories]
+        # Columns of each table's categories in the centroid matrix
+        self.table_columns: Dict[str, slice] = {}
+        start = 0
+        for table, categories in tables.items():
+            self.table_columns[table] = slice(start, start + len(categories))
+            start += len(categories)
+        embedder.fit_idf([" ".join(keywords) for categories in tables.values()
+                          for keywords in categories.values()])
+
+        centroids = []
+        for table, category in self.labels:
+            centroid = embedder.embed(tables[table][category]).mean(axis=0)
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+        # Transposed once so scoring is embeddings @ centroids
+        self.centroids = np.ascontiguousarray(np.array(centroids, dtype=np.float32).T)
+
+    @property
+    def name(self) -> str:
+        return self.embedder.name
+
+    def similarities(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts x categories) cosine similarities to every centroid"""
+        return self.embedder.embed(texts) @ self.centroids
+
+    def supports(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts x categories) mask of the categories each text supports
+
+        Per table, the most similar category and those within margin of it,
+        if they reach the embedder's minimum similarity.
+        """
+        similarities = self.similarities(texts)
+        mask = similarities >= self.embedder.min_similarity
+        for columns in self.table_columns.values():
+            table = similarities[:, columns]
+            mask[:, columns] &= table >= table.max(axis=1, keepdims=True) - self.margin
+        return mask
+
+    def scorer(self, batch_size: int = AnalysisConfig.EMBEDDING_BATCH_SIZE) -> 'CategoryScorer':
+        """Accumulator classifying one user's posts in batches"""
+        return CategoryScorer(self, batch_size)
+
+
+class CategoryScorer:
+    """Counts the posts supporting each category, per subreddit
+
+    Posts are buffered and classified batch_size at a time, so a typical
+    user costs one embedding pass and one matrix multiply while memory
+    stays bounded for long histories.
+    """
+
+    def __init__(self, classifier: EmbeddingClassifier, batch_size: int):
+        self.classifier = classifier
+        self.batch_size = max(batch_size, 1)
+        self.texts: List[str] = []
+        self.subreddits: List[str] = []
+        self.support: Counter = Counter()  # (label index, subreddit) -> posts
+        self.posts = 0
+
+    def add(self, text: str, subreddit: str):
+        self.texts.append(text)
+        self.subreddits.append(subreddit)
+        if len(self.texts) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Classify the buffered posts"""
+        if not self.texts:
+            return
+        rows, labels = np.nonzero(self.classifier.supports(self.texts))
+        self.posts += len(self.texts)
+        self.support.update(zip(labels.tolist(), (self.subreddits[row] for row in rows.tolist())))
+        self.texts.clear()
+        self.subreddits.clear()
+
+    def detect(self, table: str, limit: Optional[int] = None,
+               min_posts: int = AnalysisConfig.EMBEDDING_MIN_POSTS,
+               min_share: float = AnalysisConfig.EMBEDDING_MIN_POST_SHARE) -> Dict[str, Dict[str, int]]:
+        """Categories of table supported by enough posts, strongest first
+
+        A category needs at least min_posts supporting posts and min_share
+        of all the posts scored. The evidence of each category is its
+        supporting posts per subreddit.
+        """
+        self.flush()
+        min_posts = max(min_posts, math.ceil(min_share * self.posts))
+        evidence: Dict[str, Counter] = {}
+        for (label, subreddit), posts in self.support.items():
+            label_table, category = self.classifier.labels[label]
+            if label_table == table:
+                evidence.setdefault(category, Counter())[f"r/{subreddit}"] += posts
+
+        detected = [category for category, hits in evidence.items() if sum(hits.values()) >= min_posts]
+        detected.sort(key=lambda category: sum(evidence[category].values()), reverse=True)
+        return {category: dict(evidence[category].most_common()) for category in detected[:limit]}
+
+
+def create_embedder(model_name: Optional[str] = AnalysisConfig.EMBEDDING_MODEL):
+    """Sentence-transformers model when configured and available, else hashing"""
+    if model_name:
+        try:
+            return SentenceEmbedder(model_name)
+        except Exception as e:
+            print(f"⚠️  Embedding model unavailable ({e}); using hashed TF-IDF")
+    return HashingEmbedder()
+
+
+@lru_cache(maxsize=None)
+def get_default_classifier() -> EmbeddingClassifier:
+    """Return the shared classifier built from the keyword tables in config.py"""
+    return EmbeddingClassifier(create_embedder(), {
+        'interests': INTEREST_KEYWORDS,
+        'personality': PERSONALITY_INDICATORS,
+        'age': AGE_INDICATORS,
+    })
+
+
+def get_classifier(name: str) -> Optional[EmbeddingClassifier]:
+    """Classifier for a RULE_CLASSIFIER setting; None means keyword matching"""
+    if name == "keywords":
+        return None
+    if name == "embeddings":
+        return get_default_classifier()
+    raise ValueError(f"Unknown rule classifier: {name}")
@@ -0,0 +1,239 @@
+"""
+Per-stage timing and counters for persona generation
+
+Every stage of the pipeline (username extraction, each Reddit request, the
+scrape as a whole, OpenAI requests, rule-based and LLM analysis, saving)
+runs inside `stage(...)`, which records its wall time in a histogram, adds
+the stage's counters (items, bytes, tokens) to running totals and emits one
+structured JSON log line. Retries are counted by the request scheduler.
+
+Metrics are exported in the Prometheus text format, either written to a
+file (for node_exporter's textfile collector) or served over HTTP.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Structured log records go to this logger as one JSON object per line
+logger = logging.getLogger("persona.metrics")
+logger.addHandler(logging.NullHandler())
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of counters and duration histograms"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        # name -> labels -> [bucket counts..., count, sum]
+        self.histograms: Dict[str, Dict[LabelSet, list]] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add value to a counter"""
+        key = _labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a histogram"""
+        key = _labels(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def value(self, name: str, **labels) -> float:
+        """Current value of a counter (0 if never incremented)"""
+        with self.lock:
+            return self.counters.get(name, {}).get(_labels(labels), 0)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, state in sorted(series.items()):
+                    for bound, count in zip(self.buckets, state):
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {state[-2]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {state[-2]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {state[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomically replace path with the current metrics"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+# Process-wide registry used by the analyzer modules
+METRICS = Metrics()
+
+
+class Span:
+    """Counters collected while one stage runs"""
+
+    __slots__ = ('stage', 'fields', 'counts')
+
+    def __init__(self, stage: str, fields: Dict):
+        self.stage = stage
+        self.fields = fields
+        self.counts: Dict[str, float] = {}
+
+    def add(self, counter: str, value: float = 1):
+        """Count items, bytes, tokens, ... for this stage"""
+        self.counts[counter] = self.counts.get(counter, 0) + value
+
+
+def record_stage(span: Span, seconds: float, status: str = "ok", metrics: Metrics = METRICS):
+    """Record the duration, counters and log line of a finished stage"""
+    metrics.observe("persona_stage_seconds", seconds, stage=span.stage)
+    if status == "error":
+        metrics.inc("persona_stage_errors_total", stage=span.stage)
+    for counter, value in span.counts.items():
+        metrics.inc(f"persona_{counter}_total", value, stage=span.stage)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            "event": "stage", "stage": span.stage, "status": status,
+            "seconds": round(seconds, 6), **span.fields, **span.counts,
+        }, default=str))
+
+
+@contextmanager
+def stage(name: str, metrics: Metrics = METRICS, **fields) -> Iterator[Span]:
+    """Time a pipeline stage and record its counters
+
+    fields (e.g. username) appear only in the structured log, so they do
+    not create a Prometheus series per user.
+    """
+    span = Span(name, fields)
+    status = "ok"
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        record_stage(span, time.perf_counter() - started, status, metrics)
+
+
+class StageClock:
+    """A stage that runs in pieces, interleaved with other stages
+
+    Generators feeding a consumer (scraping while the rules run, streamed
+    completions written to a file) must not time the consumer's work, so
+    only the pieces run inside `running()` or `timed()` are added up, and
+    `record()` reports the total once the stage is over.
+    """
+
+    def __init__(self, name: str, metrics: Metrics = METRICS, **fields):
+        self.span = Span(name, fields)
+        self.metrics = metrics
+        self.seconds = 0.0
+
+    def add(self, counter: str, value: float = 1):
+        self.span.add(counter, value)
+
+    @contextmanager
+    def running(self) -> Iterator['StageClock']:
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def timed(self, iterable: Iterable) -> Iterator:
+        """Yield from iterable, timing only the production of each item"""
+        iterator = iter(iterable)
+        while True:
+            with self.running():
+                item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            yield item
+
+    def record(self, status: str = "ok"):
+        record_stage(self.span, self.seconds, status, self.metrics)
+
+
+# Sentinel ending StageClock.timed
+_EXHAUSTED = object()
+
+
+def configure_logging(path: Optional[str] = None):
+    """Send structured stage logs to a file, or to stderr when path is '-'"""
+    handler = logging.StreamHandler() if path in (None, '-') else logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1',
+                         metrics: Metrics = METRICS) -> ThreadingHTTPServer:
+    """Serve /metrics in the Prometheus text format from a daemon thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
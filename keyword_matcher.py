@@ -0,0 +1,78 @@
+"""
+Single-pass keyword matcher for rule-based persona analysis
+
+All keyword tables (interests, personality indicators, age indicators) are
+compiled into one case-insensitive alternation regex with word boundaries.
+A single scan over the text yields per-keyword hit counts, which are then
+mapped back to every table and category the keyword belongs to, so the cost
+of rule-based scoring stays linear in the size of the text.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from config import AGE_INDICATORS, INTEREST_KEYWORDS, PERSONALITY_INDICATORS
+
+# Category hits per table: {table: {category: {keyword: count}}}
+CategoryHits = Dict[str, Dict[str, Dict[str, int]]]
+
+
+def _normalize(keyword: str) -> str:
+    """Lowercase a keyword and collapse internal whitespace"""
+    return " ".join(keyword.lower().split())
+
+
+class KeywordMatcher:
+    """Compiled matcher scoring several keyword tables in one pass"""
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        """Build the matcher from {table: {category: [keywords]}}"""
+        self.tables = tables
+        self.keyword_categories: Dict[str, List[Tuple[str, str]]] = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    owners = self.keyword_categories.setdefault(_normalize(keyword), [])
+                    if (table, category) not in owners:
+                        owners.append((table, category))
+
+        # Longest keywords first so phrases win over their prefixes
+        alternatives = sorted(self.keyword_categories, key=len, reverse=True)
+        pattern = "|".join(r"\s+".join(re.escape(word) for word in keyword.split())
+                           for keyword in alternatives)
+        # Whole words only, allowing a plain plural ("game" matches "games")
+        self.pattern = re.compile(rf"(?<!\w)({pattern})(?:e?s)?(?!\w)", re.IGNORECASE)
+
+    def count(self, text: str) -> Counter:
+        """Return hit counts of every keyword found in text"""
+        return Counter(_normalize(match.group(1)) for match in self.pattern.finditer(text))
+
+    def categorize(self, hits: Counter) -> CategoryHits:
+        """Group keyword hit counts by table and category"""
+        result: CategoryHits = {table: {} for table in self.tables}
+        for keyword, count in hits.items():
+            for table, category in self.keyword_categories.get(keyword, ()):
+                result[table].setdefault(category, {})[keyword] = count
+        return result
+
+    def score(self, text: str) -> CategoryHits:
+        """Scan text once and return hits grouped by table and category"""
+        return self.categorize(self.count(text))
+
+
+def detect_categories(category_hits: Dict[str, Dict[str, int]], min_keywords: int) -> List[str]:
+    """Return categories matched by at least min_keywords distinct keywords, strongest first"""
+    detected = [category for category, hits in category_hits.items() if len(hits) >= min_keywords]
+    return sorted(detected, key=lambda category: sum(category_hits[category].values()), reverse=True)
+
+
+@lru_cache(maxsize=None)
+def get_default_matcher() -> KeywordMatcher:
+    """Return the shared matcher built from the keyword tables in config.py"""
+    return KeywordMatcher({
+        'interests': INTEREST_KEYWORDS,
+        'personality': PERSONALITY_INDICATORS,
+        'age': AGE_INDICATORS,
+    })
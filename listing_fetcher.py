@@ -0,0 +1,137 @@
+"""
+Paginated, connection-pooled Reddit listing fetcher (standard library only)
+
+Follows the `after` cursor of Reddit's public JSON listings with the largest
+page size, reusing keep-alive http.client connections from a small pool and
+requesting gzip-compressed responses. Used by SimpleRedditAnalyzer so the
+dependency-free analyzer can cover a full history without a new TLS
+handshake for every request.
+"""
+
+import gzip
+import http.client
+import json
+import queue
+import urllib.parse
+from typing import Any, Dict, Iterator, Optional
+
+from config import AnalysisConfig
+from instrumentation import METRICS, stage
+from ratelimit import RETRYABLE_STATUS, RequestScheduler, RetryableResponse
+
+# Largest page size the listing endpoints accept
+PAGE_SIZE = 100
+
+
+class ConnectionPool:
+    """Small pool of keep-alive HTTP(S) connections to one host"""
+
+    def __init__(self, host: str, port: Optional[int] = None, use_tls: bool = True,
+                 size: int = 4, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=size)
+
+    def get(self) -> http.client.HTTPConnection:
+        """Return an idle connection, or open a new one"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            connection_class = http.client.HTTPSConnection if self.use_tls else http.client.HTTPConnection
+            return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def put(self, connection: http.client.HTTPConnection):
+        """Return a healthy connection to the pool, closing it if the pool is full"""
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ListingFetcher:
+    """Fetch Reddit JSON listings page by page over pooled connections"""
+
+    def __init__(self, user_agent: str = 'PersonaAnalyzer/1.0', host: str = 'www.reddit.com',
+                 port: Optional[int] = None, use_tls: bool = True, pool_size: int = 4,
+                 scheduler: Optional[RequestScheduler] = None,
+                 max_pages: int = AnalysisConfig.SIMPLE_MAX_PAGES):
+        self.user_agent = user_agent
+        self.pool = ConnectionPool(host, port, use_tls, pool_size)
+        self.scheduler = scheduler
+        self.max_pages = max_pages
+
+    def _request(self, path: str) -> Dict[str, Any]:
+        """GET one path and decode its (possibly gzip-compressed) JSON body"""
+        connection = self.pool.get()
+        try:
+            connection.request('GET', path, headers={
+                'User-Agent': self.user_agent,
+                'Accept-Encoding': 'gzip',
+                'Connection': 'keep-alive',
+            })
+            response = connection.getresponse()
+            body = response.read()
+            METRICS.inc("persona_bytes_total", len(body), stage="reddit_request")
+        except (http.client.HTTPException, OSError) as e:
+            # Stale keep-alive connections surface here; drop it and let the scheduler retry
+            connection.close()
+            raise ConnectionError(f"request to {path} failed: {e}") from e
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.put(connection)
+
+        if self.scheduler:
+            self.scheduler.observe_headers('reddit', response.headers)
+        if response.status in RETRYABLE_STATUS:
+            raise RetryableResponse(response, response.status)
+        if response.status != 200:
+            raise Exception(f"HTTP {response.status} {response.reason} for {path}")
+
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body.decode('utf-8'))
+
+    def get_json(self, path: str, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """GET a JSON document through the scheduler (rate limit and retries)"""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        with stage("reddit_request"):
+            if self.scheduler:
+                return self.scheduler.call('reddit', self._request, path)
+            return self._request(path)
+
+    def iter_children(self, username: str, max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield listing children of a user's overview, following the after cursor"""
+        after = None
+        for _ in range(max_pages or self.max_pages):
+            params = {'limit': str(PAGE_SIZE), 'raw_json': '1'}
+            if after:
+                params['after'] = after
+            page = self.get_json(f"/user/{urllib.parse.quote(username)}.json", params)
+            data = page.get('data', {})
+            children = data.get('children', [])
+            yield from children
+
+            after = data.get('after')
+            if not after or not children:
+                return
+
+    def fetch_listing(self, username: str, max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Return all fetched pages merged into one listing document"""
+        children = list(self.iter_children(username, max_pages))
+        return {'kind': 'Listing', 'data': {'children': children}}
+
+    def close(self):
+        self.pool.close()
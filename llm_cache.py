@@ -0,0 +1,98 @@
+"""
+Content-addressed cache for OpenAI chat completion responses
+
+Responses are keyed by a hash of everything that determines the completion
+(model, prompts, temperature and max_tokens), evicted least-recently-used
+beyond a size bound, and optionally expired after a TTL. The cache can be
+saved to and loaded from a JSON file so re-runs benefit as well.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of completion texts with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str,
+                 temperature: float, max_tokens: int) -> str:
+        """Return the cache key for one chat completion request"""
+        payload = json.dumps([model, system_prompt, user_prompt, temperature, max_tokens],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entries if full"""
+        with self.lock:
+            self.entries[key] = (time.time(), response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def save(self, path: str):
+        """Write all unexpired entries to a JSON file"""
+        with self.lock:
+            entries = [[key, stored_at, response] for key, (stored_at, response) in self.entries.items()
+                       if not self._expired(stored_at)]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Load entries saved by save(), returning how many were kept"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+        with self.lock:
+            for key, stored_at, response in entries:
+                if not self._expired(stored_at):
+                    self.entries[key] = (stored_at, response)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return len(self.entries)
@@ -8,64 +8,126 @@ using web scraping and AI-powered content analysis.
 Author: AI/LLM Engineer Intern
 """
 
-import praw
+import argparse
+import asyncio
 import json
 import os
 import re
+import sys
 import time
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-import openai
-from openai import OpenAI
+from functools import cached_property
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, TextIO, Tuple
 
+from config import AnalysisConfig, APIConfig, CacheConfig, InstrumentationConfig
+from instrumentation import METRICS, StageClock, configure_logging, stage
+from llm_cache import ResponseCache
+from map_reduce import MapReduceAnalyzer
+from models import PostBatch, RedditPost
+from persona_result import PersonaResult, render_header, render_markdown, render_rules_body
+from post_store import PostStore
+from prompt_packer import PackedPrompt, PromptPacker
+from prompts import SYSTEM_PROMPT, section_list
+from ratelimit import RequestScheduler, create_scheduler
+from section_analyzer import SectionAnalyzer, find_section
 
-@dataclass
-class RedditPost:
-    """Data class to store Reddit post information"""
-    title: str
-    content: str
-    subreddit: str
-    score: int
-    created_utc: float
-    url: str
-    post_type: str  # 'post' or 'comment'
+# praw and openai take most of the startup time, so they are imported only
+# when the analyzer first talks to Reddit (reddit_client) or OpenAI; the
+# NumPy-backed rule engine, deduplicator and cohort index likewise load on
+# first use
 
 
 class RedditUserAnalyzer:
     """Main class for analyzing Reddit user profiles and generating personas"""
     
-    def __init__(self):
-        """Initialize the analyzer with API credentials"""
-        self.reddit = None
-        self.openai_client = None
-        self.setup_apis()
+    def __init__(self, scheduler: Optional[RequestScheduler] = None,
+                 store: Optional[PostStore] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 analysis_mode: str = AnalysisConfig.OPENAI_ANALYSIS_MODE,
+                 praw_settings: Optional[Dict[str, Any]] = None,
+                 rules_only: bool = False,
+                 rule_classifier: str = AnalysisConfig.RULE_CLASSIFIER,
+                 dedup: bool = AnalysisConfig.DEDUP_ENABLED,
+                 scrape_backend: str = APIConfig.REDDIT_SCRAPE_BACKEND):
+        """Initialize the analyzer with API credentials
+
+        A scheduler shared between several analyzers keeps their combined
+        Reddit and OpenAI request rates within the API quotas and retries
+        throttled or failed calls. With a store, scraped items
+        are cached on disk and repeat runs only fetch new activity. Identical
+        OpenAI requests are answered from response_cache. analysis_mode selects
+        how OpenAI analysis is run ("single", "map_reduce" or "auto").
+        praw_settings are extra praw.Reddit settings, e.g. oauth_url and
+        reddit_url to point PRAW at a local stand-in server. With rules_only
+        OpenAI is never used (or imported), even when a key is set.
+        rule_classifier selects how the rules core detects interests,
+        personality and age ("keywords" or "embeddings"). With dedup,
+        reposts and near-identical items are dropped before analysis.
+        scrape_backend selects how histories are scraped ("praw" or "async",
+        see async_scraper); the async backend reads the public JSON listings
+        from praw_settings' reddit_url when one is set.
+
+        The API clients are connected on first use; call setup_apis() to
+        connect them up front.
+        """
+        self.scheduler = scheduler or create_scheduler()
+        self.store = store
+        if response_cache is None:
+            response_cache = ResponseCache(CacheConfig.LLM_CACHE_MAX_ENTRIES, CacheConfig.LLM_CACHE_TTL)
+        self.response_cache = response_cache
+        self.analysis_mode = analysis_mode
+        self.last_packed_prompt: Optional[PackedPrompt] = None
+        self.last_analysis_mode: Optional[str] = None
+        self.praw_settings = praw_settings or {}
+        self.rules_only = rules_only
+        self.rule_classifier = rule_classifier
+        self.dedup = dedup
+        if scrape_backend not in ("praw", "async"):
+            raise ValueError(f"Unknown scrape backend: {scrape_backend}")
+        self.scrape_backend = scrape_backend
+        self.last_dedup = None  # dedup.Deduplicator of the last deduplicate() pass
     
     def setup_apis(self):
-        """Setup Reddit and OpenAI API connections"""
-        # Reddit API Setup
+        """Connect the Reddit and OpenAI clients now instead of on first use"""
+        if self.reddit is None:
+            return
+        self.openai_client
+    
+    @cached_property
+    def reddit(self):
+        """PRAW client, created on first use (None if setup failed)"""
         try:
-            self.reddit = praw.Reddit(
-                client_id=os.getenv('REDDIT_CLIENT_ID'),
-                client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-                user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaAnalyzer/1.0')
-            )
+            from reddit_client import create_reddit
+            reddit = create_reddit(self.scheduler, self.praw_settings)
             print("✅ Reddit API connected successfully")
+            return reddit
         except Exception as e:
             print(f"❌ Reddit API setup failed: {e}")
             print("Please check your Reddit API credentials in environment variables")
-            return
-        
-        # OpenAI API Setup
+            return None
+    
+    @cached_property
+    def openai_client(self):
+        """OpenAI client, created on first use (None for rule-based analysis)"""
+        if self.rules_only:
+            return None
         try:
             openai_api_key = os.getenv('OPENAI_API_KEY')
-            if openai_api_key:
-                self.openai_client = OpenAI(api_key=openai_api_key)
-                print("✅ OpenAI API connected successfully")
-            else:
+            if not openai_api_key:
                 print("⚠️  OpenAI API key not found. Will use rule-based analysis.")
+                return None
+            from openai import OpenAI
+            # Retries are left to the shared scheduler
+            client = OpenAI(api_key=openai_api_key, max_retries=0, timeout=APIConfig.OPENAI_TIMEOUT)
+            print("✅ OpenAI API connected successfully")
+            return client
         except Exception as e:
             print(f"⚠️  OpenAI API setup failed: {e}. Will use rule-based analysis.")
+            return None
+    
+    @cached_property
+    def prompt_packer(self) -> PromptPacker:
+        """Prompt packer, created on first use since loading the tokenizer is slow"""
+        return PromptPacker()
     
     def extract_username_from_url(self, profile_url: str) -> str:
         """Extract username from Reddit profile URL"""
@@ -77,85 +139,279 @@ class RedditUserAnalyzer:
             r'reddit\.com/u/([^/]+)/'
         ]
         
-        for pattern in patterns:
-            match = re.search(pattern, profile_url)
-            if match:
-                return match.group(1)
+        with stage("extract_username"):
+            for pattern in patterns:
+                match = re.search(pattern, profile_url)
+                if match:
+                    return match.group(1)
         
         raise ValueError(f"Could not extract username from URL: {profile_url}")
     
-    def scrape_user_data(self, username: str, limit: int = 100) -> List[RedditPost]:
-        """Scrape posts and comments from a Reddit user profile"""
+    def iter_user_data(self, username: str, limit: int = 100,
+                       since: Optional[Dict[str, float]] = None) -> Iterator[RedditPost]:
+        """Yield posts and comments from a Reddit user profile as they are fetched
+
+        since maps post_type to a created_utc high-water mark. Listings are
+        newest first, so scraping of a type stops at the first item that is
+        not newer than its mark.
+        """
+        since = since or {}
+        if self.scrape_backend == "async":
+            yield from self._iter_user_data_async(username, limit, since)
+            return
         if not self.reddit:
             raise Exception("Reddit API not initialized")
         
         print(f"🔍 Scraping data for user: {username}")
-        user_data = []
         
+        # Only Reddit's side is timed: the consumer runs between the yields
+        clock = StageClock("scrape", username=username)
+        status = "ok"
         try:
             user = self.reddit.redditor(username)
             
             # Check if user exists
             try:
-                user.id  # This will throw an exception if user doesn't exist
+                with clock.running():
+                    user.id  # This will throw an exception if user doesn't exist
             except Exception:
                 raise Exception(f"User '{username}' not found or may be suspended")
             
             print(f"📝 Collecting posts...")
             # Get user's posts
             post_count = 0
-            for submission in user.submissions.new(limit=limit):
+            for submission in clock.timed(user.submissions.new(limit=limit)):
                 if post_count >= limit:
                     break
+                if submission.created_utc <= since.get("post", -1):
+                    break
                 
-                user_data.append(RedditPost(
-                    title=submission.title,
-                    content=submission.selftext if submission.selftext else "",
-                    subreddit=str(submission.subreddit),
-                    score=submission.score,
-                    created_utc=submission.created_utc,
-                    url=f"https://reddit.com{submission.permalink}",
-                    post_type="post"
-                ))
+                clock.add("items")
+                yield RedditPost.from_submission(submission)
                 post_count += 1
             
             print(f"💬 Collecting comments...")
             # Get user's comments
             comment_count = 0
-            for comment in user.comments.new(limit=limit):
+            for comment in clock.timed(user.comments.new(limit=limit)):
                 if comment_count >= limit:
                     break
+                if comment.created_utc <= since.get("comment", -1):
+                    break
                 
-                user_data.append(RedditPost(
-                    title=f"Comment in r/{comment.subreddit}",
-                    content=comment.body if comment.body else "",
-                    subreddit=str(comment.subreddit),
-                    score=comment.score,
-                    created_utc=comment.created_utc,
-                    url=f"https://reddit.com{comment.permalink}",
-                    post_type="comment"
-                ))
+                clock.add("items")
+                yield RedditPost.from_comment(comment)
                 comment_count += 1
             
-            print(f"✅ Collected {len(user_data)} posts and comments")
-            return user_data
+            print(f"✅ Collected {post_count + comment_count} posts and comments")
             
         except Exception as e:
+            status = "error"
             raise Exception(f"Error scraping user data: {e}")
+        finally:
+            clock.record(status)
     
-    def analyze_with_openai(self, user_data: List[RedditPost], username: str) -> str:
-        """Use OpenAI to analyze user data and generate persona"""
-        if not self.openai_client:
-            return None
+    def _iter_user_data_async(self, username: str, limit: int,
+                              since: Dict[str, float]) -> Iterator[RedditPost]:
+        """Scrape both listings concurrently with the aiohttp backend, then yield the items"""
+        # aiohttp is only imported when this backend is used
+        from async_scraper import REDDIT_BASE_URL, AsyncRedditScraper
+        
+        base_url = self.praw_settings.get('reddit_url', REDDIT_BASE_URL)
         
-        # Prepare content for analysis
-        content_for_analysis = []
-        for post in user_data[:50]:  # Limit to avoid token limits
-            content_for_analysis.append(f"[{post.post_type.upper()}] in r/{post.subreddit}: {post.title}\n{post.content[:500]}")
+        async def scrape() -> PostBatch:
+            async with AsyncRedditScraper(user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaAnalyzer/1.0'),
+                                          base_url=base_url, scheduler=self.scheduler) as scraper:
+                return await scraper.scrape_user(username, limit, since)
         
-        combined_content = "\n\n".join(content_for_analysis)
+        print(f"🔍 Scraping data for user: {username}")
+        # The stage ends before the first item is yielded, so the consumer is not timed
+        with stage("scrape", username=username) as span:
+            try:
+                batch = asyncio.run(scrape())
+            except Exception as e:
+                raise Exception(f"Error scraping user data: {e}")
+            span.add("items", len(batch))
+        print(f"✅ Collected {len(batch)} posts and comments")
+        yield from batch
+    
+    def scrape_user_data(self, username: str, limit: int = 100,
+                         since: Optional[Dict[str, float]] = None) -> List[RedditPost]:
+        """Scrape posts and comments from a Reddit user profile"""
+        return list(self.iter_user_data(username, limit, since))
+    
+    def probe_newest(self, username: str) -> Optional[Tuple[str, float]]:
+        """Return (fullname, created_utc) of a user's newest post or comment
+
+        One request for the first item of the overview listing, so a user
+        with no new activity can be skipped without scraping.
+        """
+        with stage("probe", username=username):
+            for item in self.reddit.redditor(username).new(limit=1):
+                return item.fullname, item.created_utc
+        return None
+    
+    def stream_user_data(self, username: str, limit: int = 100,
+                         cached_only: bool = False) -> Iterator[RedditPost]:
+        """Yield a user's posts and comments one at a time
+
+        Without a post store items are yielded while they are being scraped.
+        With a store only items newer than the cached history are scraped,
+        and the merged history (up to limit of each type) is read back from disk.
+        cached_only skips scraping when the store is already up to date.
+        """
+        if not self.store:
+            yield from self.iter_user_data(username, limit)
+            return
+        if cached_only:
+            yield from self.store.iter_posts(username, limit)
+            return
         
-        prompt = f"""
+        since = self.store.high_water_marks(username)
+        added = self.store.add_posts(username, self.iter_user_data(username, limit, since=since))
+        if since:
+            print(f"💾 Merged {added} new items into cached history")
+        yield from self.store.iter_posts(username, limit)
+    
+    def load_user_data(self, username: str, limit: int = 100) -> PostBatch:
+        """Return a user's posts and comments as a compact columnar batch"""
+        return PostBatch(self.stream_user_data(username, limit))
+    
+    def deduplicate(self, posts: Iterable[RedditPost]) -> Iterator[RedditPost]:
+        """Drop exact and near-duplicate posts, counting them in last_dedup"""
+        self.last_dedup = None
+        if self.dedup:
+            from dedup import Deduplicator
+            self.last_dedup = Deduplicator()
+        return self.last_dedup.filter(posts) if self.last_dedup else iter(posts)
+    
+    def report_dedup(self, result: PersonaResult):
+        """Record how many items the last deduplicate() pass removed"""
+        dedup = self.last_dedup
+        if not dedup or not dedup.removed:
+            return
+        result.duplicates_removed = dedup.removed
+        print(f"🧹 Removed {dedup.exact} duplicate and {dedup.near} near-duplicate items")
+        METRICS.inc("persona_dedup_removed_total", dedup.exact, kind="exact")
+        METRICS.inc("persona_dedup_removed_total", dedup.near, kind="near")
+    
+    def _chat_completion(self, system_prompt: str, prompt: str,
+                         model: str = AnalysisConfig.OPENAI_MODEL,
+                         max_tokens: int = AnalysisConfig.OPENAI_MAX_TOKENS,
+                         temperature: float = AnalysisConfig.OPENAI_TEMPERATURE,
+                         refresh: bool = False) -> str:
+        """Run one chat completion, answering from the response cache when possible
+
+        With refresh the cached response is ignored and replaced.
+        """
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+            cached = None if refresh else self.response_cache.get(key)
+            if cached is not None:
+                print("💾 Using cached OpenAI response")
+                METRICS.inc("persona_llm_cache_hits_total")
+                return cached
+        
+        def create():
+            raw = self.openai_client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            self.scheduler.observe_headers('openai', raw.headers)
+            return raw.parse()
+        
+        with stage("openai_request", model=model) as span:
+            response = self.scheduler.call('openai', create)
+            content = response.choices[0].message.content
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                span.add("tokens_sent", usage.prompt_tokens or 0)
+                span.add("tokens_received", usage.completion_tokens or 0)
+        
+        if key is not None and content:
+            self.response_cache.put(key, content)
+        return content
+    
+    def _stream_chat_completion(self, system_prompt: str, prompt: str,
+                                model: str = AnalysisConfig.OPENAI_MODEL,
+                                max_tokens: int = AnalysisConfig.OPENAI_MAX_TOKENS,
+                                temperature: float = AnalysisConfig.OPENAI_TEMPERATURE) -> Iterator[str]:
+        """Yield a chat completion's text as it is generated
+
+        Opening the stream is retried by the scheduler like any request;
+        a failure after the first chunk propagates to the caller. Complete
+        responses are cached under the same key as _chat_completion, so a
+        cached persona is yielded in one piece.
+        """
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.make_key(model, system_prompt, prompt, temperature, max_tokens)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                print("💾 Using cached OpenAI response")
+                METRICS.inc("persona_llm_cache_hits_total")
+                yield cached
+                return
+        
+        def create():
+            raw = self.openai_client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            self.scheduler.observe_headers('openai', raw.headers)
+            return raw.parse()
+        
+        parts = []
+        with stage("openai_request", model=model) as span:
+            stream = self.scheduler.call('openai', create)
+            try:
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        span.add("tokens_sent", chunk.usage.prompt_tokens or 0)
+                        span.add("tokens_received", chunk.usage.completion_tokens or 0)
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        parts.append(text)
+                        yield text
+            finally:
+                stream.close()
+        
+        if key is not None and parts:
+            self.response_cache.put(key, "".join(parts))
+    
+    def _pack_content(self, user_data: Sequence[RedditPost], packed: Optional[PackedPrompt] = None) -> str:
+        """Pack the most informative content into the prompt token budget
+
+        packed reuses a PackedPrompt already built from the same user_data.
+        """
+        if packed is None:
+            packed = self.prompt_packer.pack(user_data)
+        self.last_packed_prompt = packed
+        print(f"📦 Packed {packed.items_used} items ({packed.tokens_used} tokens), "
+              f"dropped {packed.items_dropped} ({packed.tokens_dropped} tokens)")
+        return packed.content
+    
+    def _openai_prompt(self, user_data: Sequence[RedditPost], username: str,
+                       packed: Optional[PackedPrompt] = None) -> str:
+        """Build the single-prompt analysis request"""
+        combined_content = self._pack_content(user_data, packed)
+        # Continuation lines match the indentation of the prompt text
+        sections = section_list().replace("\n", "\n        ")
+        
+        return f"""
         Analyze the following Reddit posts and comments from user '{username}' and create a detailed personality persona. 
         For each trait you identify, please cite specific examples from the content.
 
@@ -163,151 +419,319 @@ class RedditUserAnalyzer:
         {combined_content}
 
         Please provide a comprehensive analysis including:
-        1. **Interests and Hobbies**
-        2. **Communication Style and Tone**
-        3. **Estimated Age Group**
-        4. **Possible Profession or Field**
-        5. **Political Opinions** (if evident)
-        6. **Personality Traits**
-        7. **Community Involvement**
-        8. **Overall Assessment**
+        {sections}
 
         For each section, include specific quotes or examples from their posts/comments as evidence.
         Format your response in a clear, structured way.
         """
+    
+    def analyze_with_openai(self, user_data: Sequence[RedditPost], username: str,
+                            packed: Optional[PackedPrompt] = None) -> str:
+        """Use OpenAI to analyze user data and generate persona"""
+        if not self.openai_client:
+            return None
+        
+        prompt = self._openai_prompt(user_data, username, packed)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert in personality analysis and social media behavior. Provide detailed, evidence-based personality assessments."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content
-            
+            with stage("analyze_openai", username=username) as span:
+                span.add("items", self.last_packed_prompt.items_used)
+                return self._chat_completion(SYSTEM_PROMPT, prompt)
         except Exception as e:
             print(f"⚠️  OpenAI analysis failed: {e}")
             return None
     
-    def analyze_with_rules(self, user_data: List[RedditPost], username: str) -> str:
-        """Rule-based analysis as fallback"""
-        print("🤖 Using rule-based analysis...")
+    def stream_with_openai(self, user_data: Sequence[RedditPost], username: str) -> Iterator[str]:
+        """Yield the OpenAI persona as it is generated, raising if the stream fails"""
+        prompt = self._openai_prompt(user_data, username)
+        # Only the completion is timed, not the consumer writing out each chunk
+        clock = StageClock("analyze_openai", username=username)
+        clock.add("items", self.last_packed_prompt.items_used)
+        status = "ok"
+        try:
+            yield from clock.timed(self._stream_chat_completion(SYSTEM_PROMPT, prompt))
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            clock.record(status)
+    
+    def analyze_with_map_reduce(self, user_data: Sequence[RedditPost], username: str) -> str:
+        """Use OpenAI to summarize the full history in parallel chunks and combine them"""
+        if not self.openai_client:
+            return None
         
-        # Extract basic statistics
-        total_posts = len([p for p in user_data if p.post_type == "post"])
-        total_comments = len([p for p in user_data if p.post_type == "comment"])
-        subreddits = list(set([p.subreddit for p in user_data]))
-        
-        # Analyze content
-        all_text = " ".join([p.title + " " + p.content for p in user_data])
-        word_count = len(all_text.split())
-        
-        # Simple keyword analysis for interests
-        interest_keywords = {
-            "Technology": ["python", "programming", "code", "tech", "software", "AI", "ML", "data"],
-            "Gaming": ["game", "gaming", "PC", "console", "steam", "xbox", "playstation"],
-            "Sports": ["football", "basketball", "soccer", "sports", "team", "league"],
-            "Finance": ["stock", "investment", "money", "crypto", "bitcoin", "trading"],
-            "Health": ["workout", "fitness", "health", "exercise", "gym", "diet"]
-        }
-        
-        detected_interests = []
-        for category, keywords in interest_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword.lower() in all_text.lower())
-            if matches >= 3:
-                detected_interests.append(category)
-        
-        # Generate rule-based persona
-        persona = f"""
-# Reddit User Persona Analysis for u/{username}
-
-## Overview
-- **Total Posts**: {total_posts}
-- **Total Comments**: {total_comments}
-- **Active Subreddits**: {len(subreddits)}
-- **Total Word Count**: {word_count}
+        try:
+            with stage("analyze_map_reduce", username=username) as span:
+                span.add("items", len(user_data))
+                return MapReduceAnalyzer(self._chat_completion, self.prompt_packer).analyze(user_data, username)
+        except Exception as e:
+            print(f"⚠️  OpenAI map-reduce analysis failed: {e}")
+            return None
+    
+    def analyze_with_sections(self, user_data: Sequence[RedditPost], username: str,
+                              refresh: Sequence[str] = ()) -> str:
+        """Use OpenAI to write every persona section with its own concurrent completion
 
-## Detected Interests
-{', '.join(detected_interests) if detected_interests else 'No clear patterns detected'}
+        Sections named in refresh are regenerated; the others are answered
+        from the response cache when their evidence has not changed.
+        """
+        if not self.openai_client:
+            return None
+        
+        content = self._pack_content(user_data)
+        try:
+            with stage("analyze_sections", username=username) as span:
+                span.add("items", self.last_packed_prompt.items_used)
+                return SectionAnalyzer(self._chat_completion).analyze(username, content, refresh)
+        except Exception as e:
+            print(f"⚠️  OpenAI section analysis failed: {e}")
+            return None
+    
+    def analyze_with_llm(self, user_data: Sequence[RedditPost], username: str,
+                         refresh: Sequence[str] = ()) -> str:
+        """Run OpenAI analysis in the configured analysis_mode"""
+        mode = self.analysis_mode
+        packed = None
+        if mode == "auto":
+            # The packed prompt that decides the mode is also the single prompt's content
+            packed = self.prompt_packer.pack(user_data)
+            # Only running out of tokens calls for map-reduce; histories longer than
+            # the item cap are still represented by the packed items
+            mode = "map_reduce" if packed.over_budget else "single"
+        self.last_analysis_mode = mode
+        
+        if mode == "map_reduce":
+            return self.analyze_with_map_reduce(user_data, username)
+        if mode == "sections":
+            return self.analyze_with_sections(user_data, username, refresh)
+        return self.analyze_with_openai(user_data, username, packed)
+    
+    def analyze_with_rules(self, user_data: Iterable[RedditPost], username: str) -> str:
+        """Rule-based analysis as fallback
 
-## Active Communities
-Top subreddits: {', '.join(subreddits[:10])}
+        user_data may be any iterable, including a generator of posts still
+        being scraped; it is consumed in a single streaming pass.
+        """
+        print("🤖 Using rule-based analysis...")
+        return render_rules_body(self.run_rules(user_data, username))
+    
+    def run_rules(self, user_data: Iterable[RedditPost], username: str, profile_url: str = "") -> PersonaResult:
+        """Fold posts into a StreamingRuleAnalyzer and return its result
 
-## Communication Analysis
-- Average words per post: {word_count // max(len(user_data), 1)}
-- Most active in: {max(subreddits, key=lambda x: len([p for p in user_data if p.subreddit == x])) if subreddits else 'N/A'}
+        The analyze_rules stage counts only the rule engine's own time, not
+        the time spent producing posts when user_data is still being scraped.
+        """
+        from embedding_classifier import get_classifier
+        from rule_analyzer import StreamingRuleAnalyzer
+        rules = StreamingRuleAnalyzer(classifier=get_classifier(self.rule_classifier))
+        result = rules.consume(user_data).result(username, profile_url)
+        clock = StageClock("analyze_rules", username=username)
+        clock.seconds = rules.seconds
+        clock.add("items", rules.total_items)
+        clock.record()
+        return result
+    
+    def build_result(self, profile_url: str, refresh: Sequence[str] = (),
+                     cached_only: bool = False) -> PersonaResult:
+        """Generate the structured persona of a user, raising on failure
 
-## Content Examples
-"""
+        refresh names persona sections to regenerate in "sections" mode.
+        cached_only analyzes the post store's history without scraping.
+        """
+        started = time.perf_counter()
         
-        # Add some example posts
-        for i, post in enumerate(user_data[:5]):
-            persona += f"\n**Example {i+1}** ({post.post_type} in r/{post.subreddit}):\n"
-            persona += f"Title: {post.title}\n"
-            persona += f"Content: {post.content[:200]}...\n"
-            persona += f"Source: {post.url}\n"
+        # Extract username
+        username = self.extract_username_from_url(profile_url)
+        print(f"🎯 Analyzing user: {username}")
         
-        return persona
-    
-    def generate_persona(self, profile_url: str) -> str:
-        """Main method to generate user persona"""
-        try:
-            # Extract username
-            username = self.extract_username_from_url(profile_url)
-            print(f"🎯 Analyzing user: {username}")
-            
+        if self.openai_client:
             # Scrape user data
-            user_data = self.scrape_user_data(username)
+            user_data = PostBatch(self.deduplicate(self.stream_user_data(username, cached_only=cached_only)))
+            scraped = time.perf_counter()
             
+            # Counts, subreddits and examples always come from the rules core
+            result = self.run_rules(user_data, username, profile_url)
+            self.report_dedup(result)
+            result.timings['scrape_seconds'] = scraped - started
             if not user_data:
-                return f"No data found for user {username}"
+                return result
             
             # Try OpenAI analysis first, fall back to rule-based
-            persona = None
-            if self.openai_client:
-                print("🧠 Generating AI-powered persona...")
-                persona = self.analyze_with_openai(user_data, username)
-            
-            if not persona:
-                persona = self.analyze_with_rules(user_data, username)
-            
-            # Add metadata
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            header = f"""# Reddit User Persona Analysis
-**User**: u/{username}
-**Profile URL**: {profile_url}
-**Analysis Date**: {timestamp}
-**Data Points Analyzed**: {len(user_data)} posts and comments
+            print("🧠 Generating AI-powered persona...")
+            persona = self.analyze_with_llm(user_data, username, refresh)
+            if persona:
+                mode = self.last_analysis_mode
+                result.set_llm_text(persona, mode if mode in ("map_reduce", "sections") else "openai")
+            else:
+                print("🤖 Using rule-based analysis...")
+            result.timings['analysis_seconds'] = time.perf_counter() - scraped
+        else:
+            # Posts stream into the rules without being held in memory; without a
+            # post store they are analyzed while being scraped, with one they are
+            # scraped into the store first and streamed back from disk
+            print("🤖 Using rule-based analysis...")
+            posts = self.stream_user_data(username, cached_only=cached_only)
+            result = self.run_rules(self.deduplicate(posts), username, profile_url)
+            self.report_dedup(result)
+        
+        result.timings['total_seconds'] = time.perf_counter() - started
+        return result
+    
+    def stream_result(self, profile_url: str) -> Iterator[Tuple[str, Any]]:
+        """Generate a persona, yielding ('text', chunk) events as the report is written
 
----
+        The header is yielded as soon as scraping finishes and OpenAI text
+        follows chunk by chunk. If the stream fails midway, a ('reset', None)
+        event tells the consumer to discard the text so far and the
+        rule-based report follows. The last event is ('result', PersonaResult).
+        Streaming always uses the single packed prompt.
+        """
+        started = time.perf_counter()
+        username = self.extract_username_from_url(profile_url)
+        print(f"🎯 Analyzing user: {username}")
+        
+        if self.openai_client:
+            user_data = PostBatch(self.deduplicate(self.stream_user_data(username)))
+            result = self.run_rules(user_data, username, profile_url)
+        else:
+            print("🤖 Using rule-based analysis...")
+            posts = self.deduplicate(self.stream_user_data(username))
+            result = self.run_rules(posts, username, profile_url)
+        self.report_dedup(result)
+        scraped = time.perf_counter()
+        result.timings['scrape_seconds'] = scraped - started
+        
+        if not result.item_count:
+            yield ('text', render_markdown(result))
+        elif self.openai_client:
+            header = render_header(result)
+            yield ('text', header)
+            print("🧠 Streaming AI-powered persona...")
+            self.last_analysis_mode = "single"
+            parts = []
+            try:
+                for text in self.stream_with_openai(user_data, username):
+                    parts.append(text)
+                    yield ('text', text)
+                if not parts:
+                    raise Exception("empty completion")
+                result.set_llm_text("".join(parts), "openai")
+            except Exception as e:
+                print(f"⚠️  OpenAI stream failed: {e}")
+                print("🤖 Using rule-based analysis...")
+                if parts:
+                    yield ('reset', None)
+                    yield ('text', header)
+                yield ('text', render_rules_body(result))
+        else:
+            yield ('text', render_markdown(result))
+        
+        result.timings['analysis_seconds'] = time.perf_counter() - scraped
+        result.timings['total_seconds'] = time.perf_counter() - started
+        yield ('result', result)
+    
+    def stream_persona(self, profile_url: str, output_dir: str = ".",
+                       echo: Optional[TextIO] = None) -> Tuple[Optional[str], PersonaResult]:
+        """Write the persona file (and echo it) while it is being generated
 
-"""
-            
-            return header + persona
-            
+        Returns (filename, result). After a mid-stream failure the file is
+        rewritten with the rule-based report.
+        """
+        username = self.extract_username_from_url(profile_url)
+        filename = os.path.join(output_dir, f"{username}_persona.txt")
+        result = None
+        
+        with stage("save", username=username) as span, open(filename, 'w', encoding='utf-8') as f:
+            for event, value in self.stream_result(profile_url):
+                if event == 'text':
+                    f.write(value)
+                    f.flush()
+                    if echo:
+                        echo.write(value)
+                        echo.flush()
+                elif event == 'reset':
+                    f.seek(0)
+                    f.truncate()
+                    if echo:
+                        echo.write("\n\n⚠️  Stream interrupted, rule-based persona follows\n\n")
+                else:
+                    result = value
+            span.add("bytes", f.tell())
+        
+        print(f"\n✅ Persona saved to: {filename}")
+        return filename, result
+    
+    def build_persona(self, profile_url: str) -> str:
+        """Generate user persona, raising on failure"""
+        return render_markdown(self.build_result(profile_url))
+    
+    def generate_persona(self, profile_url: str) -> str:
+        """Main method to generate user persona"""
+        try:
+            return self.build_persona(profile_url)
         except Exception as e:
             return f"Error generating persona: {e}"
     
-    def save_persona(self, persona: str, username: str) -> str:
+    def save_persona(self, persona: str, username: str, output_dir: str = ".") -> str:
         """Save persona to text file"""
-        filename = f"{username}_persona.txt"
+        filename = os.path.join(output_dir, f"{username}_persona.txt")
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
+            with stage("save", username=username) as span, open(filename, 'w', encoding='utf-8') as f:
                 f.write(persona)
+                span.add("bytes", len(persona.encode('utf-8')))
             print(f"✅ Persona saved to: {filename}")
             return filename
         except Exception as e:
             print(f"❌ Error saving file: {e}")
             return None
+    
+    def save_persona_json(self, result: PersonaResult, output_dir: str = ".") -> str:
+        """Save the structured persona next to the text file"""
+        filename = os.path.join(output_dir, f"{result.username}_persona.json")
+        
+        try:
+            with stage("save", username=result.username) as span, open(filename, 'w', encoding='utf-8') as f:
+                content = result.to_json(indent=2)
+                f.write(content)
+                span.add("bytes", len(content.encode('utf-8')))
+            return filename
+        except Exception as e:
+            print(f"❌ Error saving file: {e}")
+            return None
 
 
-def main():
+def main(argv=None):
     """Main function to run the persona analyzer"""
+    parser = argparse.ArgumentParser(description="Generate a persona for one Reddit user")
+    parser.add_argument('profile_url', nargs='?', default=None,
+                        help="Reddit profile URL (prompted for when omitted)")
+    parser.add_argument('--rules-only', action='store_true',
+                        help="skip OpenAI and use rule-based analysis only (openai is never imported)")
+    parser.add_argument('--classifier', choices=['keywords', 'embeddings'], default=AnalysisConfig.RULE_CLASSIFIER,
+                        help="how rule-based analysis detects interests, personality and age")
+    parser.add_argument('--stream', action='store_true',
+                        help="write the OpenAI persona to the file and terminal as it is generated")
+    parser.add_argument('--mode', choices=['auto', 'single', 'map_reduce', 'sections'],
+                        default=AnalysisConfig.OPENAI_ANALYSIS_MODE, help="how OpenAI analysis is run")
+    parser.add_argument('--refresh-section', action='append', default=[], metavar='SECTION',
+                        help="regenerate one persona section (number or title) and reuse the cached "
+                             "others; implies --mode sections, may be repeated")
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false', default=AnalysisConfig.DEDUP_ENABLED,
+                        help="analyze reposts and near-identical items instead of dropping them")
+    parser.add_argument('--scrape-backend', choices=['praw', 'async'], default=APIConfig.REDDIT_SCRAPE_BACKEND,
+                        help="scrape the listings one after the other (praw) or concurrently (async)")
+    args = parser.parse_args(argv)
+    
+    try:
+        refresh = [find_section(name) for name in args.refresh_section]
+    except ValueError as e:
+        parser.error(str(e))
+    if refresh and args.stream:
+        parser.error("--refresh-section cannot be combined with --stream")
+    mode = "sections" if refresh else args.mode
+    
     print("🚀 Reddit User Persona Analyzer")
     print("=" * 50)
     
@@ -323,10 +747,19 @@ def main():
         print("See README.md for setup instructions.")
         return
     
-    analyzer = RedditUserAnalyzer()
+    if InstrumentationConfig.METRICS_LOG_PATH:
+        configure_logging(InstrumentationConfig.METRICS_LOG_PATH)
+    
+    response_cache = ResponseCache(CacheConfig.LLM_CACHE_MAX_ENTRIES, CacheConfig.LLM_CACHE_TTL)
+    if not args.rules_only:
+        response_cache.load(CacheConfig.LLM_CACHE_PATH)
+    analyzer = RedditUserAnalyzer(store=PostStore(CacheConfig.POST_STORE_PATH),
+                                  response_cache=response_cache, analysis_mode=mode,
+                                  rules_only=args.rules_only, rule_classifier=args.classifier,
+                                  dedup=args.dedup, scrape_backend=args.scrape_backend)
     
     # Get user input
-    profile_url = input("\n🔗 Enter Reddit profile URL: ").strip()
+    profile_url = (args.profile_url or input("\n🔗 Enter Reddit profile URL: ")).strip()
     
     if not profile_url:
         print("❌ No URL provided")
@@ -334,21 +767,46 @@ def main():
     
     try:
         # Generate persona
-        persona = analyzer.generate_persona(profile_url)
+        filename = None
+        try:
+            if args.stream:
+                # The file and the terminal fill up while OpenAI is still writing
+                filename, result = analyzer.stream_persona(profile_url, echo=sys.stdout)
+                persona = None
+            else:
+                result = analyzer.build_result(profile_url, refresh)
+                persona = render_markdown(result)
+        except Exception as e:
+            result = None
+            persona = f"Error generating persona: {e}"
         
         # Extract username for filename
         username = analyzer.extract_username_from_url(profile_url)
         
         # Save to file
-        filename = analyzer.save_persona(persona, username)
+        if persona is not None:
+            filename = analyzer.save_persona(persona, username)
         
         if filename:
             print(f"\n📄 Analysis complete! Check {filename} for results.")
+            json_filename = analyzer.save_persona_json(result) if result and result.item_count else None
+            if json_filename:
+                print(f"🗃️  Structured persona saved to: {json_filename}")
+                from cohort_index import CohortIndex
+                cohort_index = CohortIndex(CacheConfig.COHORT_INDEX_PATH)
+                cohort_index.try_add(result)
+                cohort_index.close()
             
-            # Show preview
-            print("\n📋 Preview:")
-            print("-" * 30)
-            print(persona[:500] + "..." if len(persona) > 500 else persona)
+            # Show preview (a streamed persona has already been printed)
+            if persona is not None:
+                print("\n📋 Preview:")
+                print("-" * 30)
+                print(persona[:500] + "..." if len(persona) > 500 else persona)
+        
+        if not args.rules_only:
+            response_cache.save(CacheConfig.LLM_CACHE_PATH)
+        if InstrumentationConfig.PROMETHEUS_FILE:
+            METRICS.write_prometheus(InstrumentationConfig.PROMETHEUS_FILE)
             
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,90 @@
+"""
+Map-reduce OpenAI analysis for users with long histories
+
+The full history is split into token-bounded chunks, each chunk is
+summarized by a concurrent completion (map), and the partial summaries are
+combined into the final eight-section persona (reduce). Chunks are cut in
+chronological order, oldest first, so new activity only changes the last
+chunk and the earlier ones keep hitting the response cache on re-runs.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from config import AnalysisConfig
+from models import RedditPost
+from prompt_packer import ITEM_SEPARATOR, PromptPacker
+from prompts import MAP_PROMPT, MAP_SYSTEM_PROMPT, REDUCE_PROMPT, SYSTEM_PROMPT, section_list
+
+
+class MapReduceAnalyzer:
+    """Summarize history chunks in parallel and reduce them into one persona"""
+
+    def __init__(self, complete: Callable[..., str], packer: PromptPacker,
+                 fan_out: int = AnalysisConfig.MAP_REDUCE_FAN_OUT,
+                 chunk_tokens: int = AnalysisConfig.MAP_REDUCE_CHUNK_TOKENS,
+                 map_max_tokens: int = AnalysisConfig.MAP_REDUCE_MAP_MAX_TOKENS):
+        """complete(system_prompt, prompt, max_tokens=...) runs one chat completion"""
+        self.complete = complete
+        self.packer = packer
+        self.fan_out = max(fan_out, 1)
+        self.chunk_tokens = chunk_tokens
+        self.map_max_tokens = map_max_tokens
+
+    def _split(self, texts: Sequence[str]) -> List[str]:
+        """Group texts into chunks of at most chunk_tokens tokens each"""
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self.packer.counter.count(text) + self.packer.separator_tokens
+            if current and current_tokens + tokens > self.chunk_tokens:
+                chunks.append(ITEM_SEPARATOR.join(current))
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(ITEM_SEPARATOR.join(current))
+        return chunks
+
+    def chunk(self, posts: Sequence[RedditPost]) -> List[str]:
+        """Split a history into prompt-sized chunks, oldest posts first"""
+        ordered = sorted(posts, key=lambda post: post.created_utc)
+        return self._split([self.packer.format_item(post) for post in ordered])
+
+    def summarize(self, username: str, chunks: Sequence[str]) -> List[str]:
+        """Map step: summarize every chunk with up to fan_out concurrent completions"""
+        def summarize_one(chunk: str) -> Optional[str]:
+            prompt = MAP_PROMPT.format(username=username, sections=section_list(), content=chunk)
+            try:
+                return self.complete(MAP_SYSTEM_PROMPT, prompt, max_tokens=self.map_max_tokens)
+            except Exception as e:
+                print(f"⚠️  Chunk summary failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.fan_out, len(chunks)) or 1) as executor:
+            summaries = [summary for summary in executor.map(summarize_one, chunks) if summary]
+
+        if chunks and not summaries:
+            raise Exception("every chunk summary failed")
+        return summaries
+
+    def analyze(self, posts: Sequence[RedditPost], username: str) -> str:
+        """Generate the persona for a full history"""
+        chunks = self.chunk(posts)
+        print(f"🗂️  Summarizing {len(chunks)} chunks with up to {self.fan_out} parallel requests...")
+        summaries = self.summarize(username, chunks)
+
+        # Summaries of very long histories may themselves exceed the budget
+        while len(summaries) > 1:
+            groups = self._split(summaries)
+            if len(groups) == 1 or len(groups) >= len(summaries):
+                break
+            summaries = self.summarize(username, groups)
+
+        prompt = REDUCE_PROMPT.format(
+            username=username,
+            summaries=ITEM_SEPARATOR.join(f"--- Part {i} ---\n{summary}" for i, summary in enumerate(summaries, 1)),
+            sections=section_list(),
+        )
+        return self.complete(SYSTEM_PROMPT, prompt)
@@ -0,0 +1,203 @@
+"""
+Data models shared by the Reddit User Persona Analyzer modules
+
+RedditPost is a slotted record: subreddit names and post types are interned,
+and the display title of a comment and the full URL of every item are
+derived on access rather than stored. PostBatch keeps many posts of one user
+in columns (typed arrays plus interned string tables), which is several times
+smaller than a list of records and can be handed to NumPy without copying;
+PostColumns holds only its numeric columns, for consumers that drop the text.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+REDDIT_URL = "https://reddit.com"
+
+# Column codes of RedditPost.post_type in PostBatch
+POST_TYPES = ("post", "comment")
+
+
+class RedditPost:
+    """Compact record of one Reddit post or comment"""
+
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('raw_title', 'content', 'subreddit', 'score', 'created_utc', 'permalink', 'post_type', 'id')
+
+    def __init__(self, raw_title: str, content: str, subreddit: str, score: int, created_utc: float,
+                 permalink: str, post_type: str, id: str = ""):
+        self.raw_title = raw_title  # submission title; empty for comments
+        self.content = content
+        self.subreddit = sys.intern(subreddit)
+        self.score = score
+        self.created_utc = created_utc
+        self.permalink = permalink  # path relative to reddit.com
+        self.post_type = sys.intern(post_type)  # 'post' or 'comment'
+        self.id = id  # Reddit fullname, e.g. 't3_abc123' or 't1_def456'
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self.__slots__, self._fields()))
+        return f"RedditPost({fields})"
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    # Mutable records compare by value, so like dataclasses they are unhashable
+    __hash__ = None
+
+    @property
+    def title(self) -> str:
+        if self.post_type == "comment":
+            return f"Comment in r/{self.subreddit}"
+        return self.raw_title
+
+    @property
+    def url(self) -> str:
+        return f"{REDDIT_URL}{self.permalink}"
+
+    @classmethod
+    def from_submission(cls, submission: Any) -> 'RedditPost':
+        """Build a RedditPost from a PRAW Submission"""
+        return cls(
+            raw_title=submission.title,
+            content=submission.selftext if submission.selftext else "",
+            subreddit=str(submission.subreddit),
+            score=submission.score,
+            created_utc=submission.created_utc,
+            permalink=submission.permalink,
+            post_type="post",
+            id=submission.fullname
+        )
+
+    @classmethod
+    def from_comment(cls, comment: Any) -> 'RedditPost':
+        """Build a RedditPost from a PRAW Comment"""
+        return cls(
+            raw_title="",
+            content=comment.body if comment.body else "",
+            subreddit=str(comment.subreddit),
+            score=comment.score,
+            created_utc=comment.created_utc,
+            permalink=comment.permalink,
+            post_type="comment",
+            id=comment.fullname
+        )
+
+    @classmethod
+    def from_listing_item(cls, item: Dict[str, Any]) -> 'RedditPost':
+        """Build a RedditPost from one child of a Reddit JSON listing"""
+        data = item.get('data', item)
+        is_comment = item.get('kind') == 't1'
+        return cls(
+            raw_title="" if is_comment else data.get('title', ''),
+            content=(data.get('body') if is_comment else data.get('selftext')) or "",
+            subreddit=data.get('subreddit', 'unknown'),
+            score=data.get('score', 0),
+            created_utc=data.get('created_utc', 0.0),
+            permalink=data.get('permalink', ''),
+            post_type="comment" if is_comment else "post",
+            id=data.get('name', '')
+        )
+
+
+class PostColumns:
+    """Numeric columns of a user's history, without the text
+
+    Typed arrays of scores, timestamps, word counts, subreddit ids and post
+    types, plus the subreddit string table, which is all the activity
+    statistics need. They can be viewed as NumPy arrays without copying.
+    """
+
+    __slots__ = ('scores', 'created_utc', 'word_counts', 'subreddit_ids', 'post_type_ids',
+                 'subreddits', '_subreddit_index')
+
+    def __init__(self):
+        self.scores = array('q')
+        self.created_utc = array('d')
+        self.word_counts = array('I')
+        self.subreddit_ids = array('I')
+        self.post_type_ids = array('B')
+        self.subreddits: List[str] = []
+        self._subreddit_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def append(self, post: RedditPost):
+        """Add the numeric fields of one post to the columns"""
+        subreddit_id = self._subreddit_index.get(post.subreddit)
+        if subreddit_id is None:
+            subreddit_id = self._subreddit_index[post.subreddit] = len(self.subreddits)
+            self.subreddits.append(post.subreddit)
+
+        self.scores.append(post.score)
+        self.created_utc.append(post.created_utc)
+        self.word_counts.append(len(post.title.split()) + len(post.content.split()))
+        self.subreddit_ids.append(subreddit_id)
+        self.post_type_ids.append(POST_TYPES.index(post.post_type))
+
+
+class PostBatch(PostColumns):
+    """Columnar container for the posts and comments of one user
+
+    The numeric PostColumns plus the text of every item, so per-item
+    overhead is a few bytes plus the text itself. Iterating or indexing
+    yields RedditPost records built on demand.
+    """
+
+    __slots__ = ('raw_titles', 'contents', 'permalinks', 'ids')
+
+    def __init__(self, posts: Iterable[RedditPost] = ()):
+        super().__init__()
+        self.raw_titles: List[str] = []
+        self.contents: List[str] = []
+        self.permalinks: List[str] = []
+        self.ids: List[str] = []
+        self.extend(posts)
+
+    def append(self, post: RedditPost):
+        """Add one post to every column"""
+        super().append(post)
+        self.raw_titles.append(post.raw_title)
+        self.contents.append(post.content)
+        self.permalinks.append(post.permalink)
+        self.ids.append(post.id)
+
+    def extend(self, posts: Iterable[RedditPost]):
+        for post in posts:
+            self.append(post)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[RedditPost, 'PostBatch']:
+        if isinstance(i, slice):
+            return self._slice(i)
+        return RedditPost(
+            raw_title=self.raw_titles[i],
+            content=self.contents[i],
+            subreddit=self.subreddits[self.subreddit_ids[i]],
+            score=self.scores[i],
+            created_utc=self.created_utc[i],
+            permalink=self.permalinks[i],
+            post_type=POST_TYPES[self.post_type_ids[i]],
+            id=self.ids[i]
+        )
+
+    def _slice(self, items: slice) -> 'PostBatch':
+        """A new batch with the items of a slice, sliced column by column"""
+        batch = PostBatch()
+        for column in ('scores', 'created_utc', 'word_counts', 'subreddit_ids', 'post_type_ids',
+                       'raw_titles', 'contents', 'permalinks', 'ids'):
+            setattr(batch, column, getattr(self, column)[items])
+        # Subreddit ids stay valid, so the string table is shared by copy
+        batch.subreddits = list(self.subreddits)
+        batch._subreddit_index = dict(self._subreddit_index)
+        return batch
+
+    def __iter__(self) -> Iterator[RedditPost]:
+        for i in range(len(self)):
+            yield self[i]
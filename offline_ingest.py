@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Offline rule-based personas for Reddit dumps
+
+Streams a Pushshift-style dump (NDJSON, optionally gzip or zstd compressed)
+and generates a rule-based persona for every author without touching the
+API. The dump is first hash-partitioned by author into shard files, so each
+shard holds complete histories while only 1/N of the dump is ever in memory
+at once. A ProcessPoolExecutor then analyzes the shards, one shard per task,
+with the same StreamingRuleAnalyzer used for live users.
+
+Usage:
+    python offline_ingest.py RC_2023-01.zst --workers 8 --output-dir personas
+    python offline_ingest.py comments.ndjson --jsonl personas.jsonl
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from cohort_index import CohortIndex
+from config import AnalysisConfig
+from dedup import Deduplicator
+from embedding_classifier import get_classifier
+from models import RedditPost
+from persona_result import PersonaResult, render_markdown
+from rule_analyzer import StreamingRuleAnalyzer
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst dumps
+    zstandard = None
+
+# Authors whose records are not attributable to a person
+SKIPPED_AUTHORS = {'[deleted]', '[removed]', ''}
+
+# Profile URL recorded for authors of a dump
+PROFILE_URL = "https://www.reddit.com/user/"
+
+# Pushshift dumps are compressed with a long window
+ZSTD_MAX_WINDOW = 2 ** 31
+
+# Plain string author field of a dump record
+AUTHOR_FIELD = re.compile(r'"author"\s*:\s*"([^"\\]*)"')
+
+# Dump text buffered in memory before it is appended to the shard files
+PARTITION_BUFFER_CHARS = 64 << 20
+
+
+def open_dump(path: str) -> TextIO:
+    """Open a dump file as text, decompressing .zst and .gz; '-' reads stdin"""
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("reading .zst dumps requires the zstandard package")
+        reader = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW).stream_reader(open(path, 'rb'))
+        return io.TextIOWrapper(reader, encoding='utf-8', errors='replace')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def post_from_record(record: Dict[str, Any]) -> RedditPost:
+    """Build a RedditPost from one Pushshift submission or comment record"""
+    is_comment = 'body' in record
+    subreddit = record.get('subreddit') or 'unknown'
+    item_id = str(record.get('id', ''))
+
+    permalink = record.get('permalink') or ''
+    if not permalink and is_comment:
+        link_id = str(record.get('link_id', '')).split('_')[-1]
+        permalink = f"/r/{subreddit}/comments/{link_id}/_/{item_id}/"
+
+    return RedditPost(
+        raw_title="" if is_comment else record.get('title') or '',
+        content=(record.get('body') if is_comment else record.get('selftext')) or "",
+        subreddit=subreddit,
+        score=int(record.get('score') or 0),
+        created_utc=float(record.get('created_utc') or 0.0),
+        permalink=permalink,
+        post_type="comment" if is_comment else "post",
+        id=record.get('name') or (f"{'t1' if is_comment else 't3'}_{item_id}" if item_id else "")
+    )
+
+
+def shard_of(author: str, shards: int) -> int:
+    """Stable shard number of an author (the same in every process)"""
+    return zlib.crc32(author.encode('utf-8')) % shards
+
+
+def author_of(line: str) -> Optional[str]:
+    """Author of one dump line, or None when the line is not a JSON object
+
+    Usernames never need escaping, so the author is normally read with a
+    regex instead of decoding the whole record. Lines are decoded when the
+    first author field might belong to a nested object (a crossposted
+    parent) or is not a plain string (null, escaped, missing or malformed).
+    """
+    match = AUTHOR_FIELD.search(line)
+    if match and not 0 < line.find('{', 1) < match.start():
+        return match.group(1)
+    try:
+        return json.loads(line).get('author') or ''
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def _flush_shards(paths: List[str], buffers: List[List[str]]):
+    """Append the buffered lines to their shard files, one file open at a time"""
+    for path, lines in zip(paths, buffers):
+        if lines:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+            lines.clear()
+
+
+def partition_dump(stream: TextIO, shard_dir: str, shards: int,
+                   buffer_chars: int = PARTITION_BUFFER_CHARS) -> Tuple[List[str], int, int]:
+    """Split dump lines into per-author-hash shard files
+
+    Returns (shard paths, records kept, lines skipped). Lines are copied
+    verbatim, so only the author field is needed at this stage. Lines are
+    buffered per shard and appended in batches of about buffer_chars, so
+    at most one shard file is open however many shards there are.
+    """
+    paths = [os.path.join(shard_dir, f"shard-{i:04d}.ndjson") for i in range(shards)]
+    for path in paths:
+        open(path, 'w', encoding='utf-8').close()
+    buffers: List[List[str]] = [[] for _ in range(shards)]
+    buffered = kept = skipped = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        author = author_of(line)
+        if author is None or author in SKIPPED_AUTHORS:
+            skipped += 1
+            continue
+        buffers[shard_of(author, shards)].append(line + "\n")
+        kept += 1
+        buffered += len(line) + 1
+        if buffered >= buffer_chars:
+            _flush_shards(paths, buffers)
+            buffered = 0
+    _flush_shards(paths, buffers)
+    return paths, kept, skipped
+
+
+def analyze_history(username: str, posts: List[RedditPost], source: str,
+                    classifier: str = AnalysisConfig.RULE_CLASSIFIER,
+                    dedup: bool = AnalysisConfig.DEDUP_ENABLED) -> PersonaResult:
+    """Rule-based persona for one author's history, newest items first"""
+    posts.sort(key=lambda post: post.created_utc, reverse=True)
+    deduplicator = Deduplicator() if dedup else None
+    rules = StreamingRuleAnalyzer(classifier=get_classifier(classifier)).consume(
+        deduplicator.filter(posts) if deduplicator else posts)
+    result = rules.result(username, f"{PROFILE_URL}{username}/")
+    result.source = source
+    if deduplicator:
+        result.duplicates_removed = deduplicator.removed
+    return result
+
+
+def persona_path(output_dir: str, username: str) -> str:
+    """Path of an author's persona file, fanned out over 256 subdirectories"""
+    bucket = f"{zlib.crc32(username.encode('utf-8')) & 0xff:02x}"
+    return os.path.join(output_dir, bucket, f"{username}_persona.txt")
+
+
+def analyze_shard(shard_path: str, source: str, output_dir: Optional[str],
+                  min_items: int = 1,
+                  classifier: str = AnalysisConfig.RULE_CLASSIFIER,
+                  dedup: bool = AnalysisConfig.DEDUP_ENABLED,
+                  cohort_index: Optional[str] = None) -> Tuple[int, List[str]]:
+    """Analyze every author of one shard in a worker process
+
+    Writes persona files when output_dir is given and returns
+    (authors analyzed, JSONL lines); lines are only built without an
+    output_dir so nothing is pickled back to the parent needlessly.
+    With a cohort_index path the shard's personas are indexed in one
+    transaction.
+    """
+    histories: Dict[str, List[RedditPost]] = defaultdict(list)
+    with open(shard_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                author = record['author']
+            except (json.JSONDecodeError, TypeError, KeyError):
+                # Malformed lines can pass the partitioner's cheap author check
+                continue
+            histories[author].append(post_from_record(record))
+
+    analyzed = 0
+    lines = []
+    results = []
+    for username, posts in histories.items():
+        if len(posts) < min_items:
+            continue
+        result = analyze_history(username, posts, source, classifier, dedup)
+        analyzed += 1
+        if cohort_index:
+            results.append(result)
+        if output_dir:
+            path = persona_path(output_dir, username)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as out:
+                out.write(render_markdown(result))
+        else:
+            lines.append(result.to_json())
+
+    if results:
+        index = CohortIndex(cohort_index)
+        index.add_many(results)
+        index.close()
+    return analyzed, lines
+
+
+def iter_shard_results(shard_paths: List[str], source: str, output_dir: Optional[str],
+                       workers: int, min_items: int = 1,
+                       classifier: str = AnalysisConfig.RULE_CLASSIFIER,
+                       dedup: bool = AnalysisConfig.DEDUP_ENABLED,
+                       cohort_index: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """Analyze shards in a process pool, yielding results as shards finish"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyze_shard, path, source, output_dir, min_items, classifier, dedup,
+                                   cohort_index)
+                   for path in shard_paths if os.path.getsize(path)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    """Command line entry point for offline persona generation"""
+    parser = argparse.ArgumentParser(description="Generate rule-based personas for every author in a Reddit dump")
+    parser.add_argument('dump', help="NDJSON dump (.zst and .gz are decompressed; '-' for stdin)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--output-dir', default='personas',
+                        help="directory of {username}_persona.txt files, sharded into subdirectories")
+    output.add_argument('--jsonl', help="write one JSON object per author to this file instead")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="analysis processes (default: CPU count)")
+    parser.add_argument('--shards', type=int, default=None,
+                        help="author partitions, at least one per task (default: 8 per worker)")
+    parser.add_argument('--min-items', type=int, default=1,
+                        help="skip authors with fewer posts and comments than this")
+    parser.add_argument('--classifier', choices=['keywords', 'embeddings'], default=AnalysisConfig.RULE_CLASSIFIER,
+                        help="how interests, personality and age are detected")
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false', default=AnalysisConfig.DEDUP_ENABLED,
+                        help="analyze reposts and near-identical items instead of dropping them")
+    parser.add_argument('--cohort-index', default=None,
+                        help="also index every persona in this SQLite file for cohort_index.py queries")
+    parser.add_argument('--tmp-dir', default=None, help="where to put the temporary shard files")
+    args = parser.parse_args(argv)
+
+    workers = max(args.workers, 1)
+    shards = max(args.shards or workers * 8, 1)
+    source = os.path.basename(args.dump) if args.dump != '-' else 'stdin'
+    output_dir = None if args.jsonl else args.output_dir
+
+    print("🚀 Reddit User Persona Analyzer (offline mode)")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as shard_dir:
+        stream = open_dump(args.dump)
+        try:
+            shard_paths, kept, skipped = partition_dump(stream, shard_dir, shards)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        print(f"🗂️  Partitioned {kept} records into {shards} shards ({skipped} skipped)")
+
+        # Created up front so the worker processes only ever add to it
+        cohort_index = CohortIndex(args.cohort_index) if args.cohort_index else None
+        analyzed = 0
+        out = open(args.jsonl, 'w', encoding='utf-8', buffering=1 << 20) if args.jsonl else None
+        try:
+            for count, lines in iter_shard_results(shard_paths, source, output_dir, workers,
+                                                   args.min_items, args.classifier, args.dedup,
+                                                   args.cohort_index):
+                analyzed += count
+                if out:
+                    out.writelines(line + "\n" for line in lines)
+                print(f"✅ {analyzed} authors analyzed")
+        finally:
+            if out:
+                out.close()
+
+    print(f"\n📄 Offline analysis complete: {analyzed} personas written to {args.jsonl or output_dir}")
+    if cohort_index:
+        cohort_index.compile()
+        cohort_index.close()
+        print(f"👥 Cohort index updated: {args.cohort_index}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Structured persona results
+
+PersonaResult holds everything a persona report is made of (counts,
+detected categories with their keyword evidence, the subreddit index,
+activity statistics, cited examples, the LLM's sections and timings), so it
+can be stored as JSON or appended to a JSONL stream and loaded without
+parsing markdown. render_markdown produces the familiar text report from
+the same object.
+"""
+
+import json
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from activity_index import SubredditActivity
+from activity_stats import ActivityStats, render_activity_stats
+from config import AnalysisConfig
+
+# Markdown heading that starts a section of an LLM-written persona
+SECTION_HEADING = re.compile(r'^#{1,4}\s*(?:\d+\.\s*)?(.+?)\s*$', re.MULTILINE)
+
+
+@dataclass
+class ExamplePost:
+    """A post or comment cited in a persona"""
+    post_type: str
+    subreddit: str
+    title: str
+    content: str
+    url: str
+    score: int
+
+
+@dataclass
+class PersonaResult:
+    """Structured persona of one user"""
+    username: str
+    profile_url: str = ""
+    generated_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec='seconds'))
+    source: str = "reddit"
+    analysis: str = "rules"  # 'rules', 'openai', 'map_reduce' or 'sections'
+    classifier: str = "keywords"  # 'keywords', 'hashing' or the embedding model
+    item_count: int = 0
+    duplicates_removed: int = 0  # reposts and near-duplicates dropped before analysis
+    posts: int = 0
+    comments: int = 0
+    word_count: int = 0
+    active_subreddits: int = 0
+    # Detected category -> keyword -> hits (or r/subreddit -> supporting posts
+    # with an embedding classifier), strongest first
+    interests: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    personality: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    age_group: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    subreddits: List[SubredditActivity] = field(default_factory=list)
+    activity: Optional[ActivityStats] = None
+    examples: List[ExamplePost] = field(default_factory=list)
+    llm_text: Optional[str] = None
+    llm_sections: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def set_llm_text(self, text: str, analysis: str):
+        """Attach an LLM-written persona and split it into its sections"""
+        self.llm_text = text
+        self.llm_sections = parse_sections(text)
+        self.analysis = analysis
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PersonaResult':
+        fields = dict(data)
+        fields['subreddits'] = [SubredditActivity(**activity) for activity in fields.get('subreddits', [])]
+        fields['examples'] = [ExamplePost(**example) for example in fields.get('examples', [])]
+        if fields.get('activity') is not None:
+            fields['activity'] = ActivityStats.from_dict(fields['activity'])
+        return cls(**fields)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'PersonaResult':
+        return cls.from_dict(json.loads(text))
+
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """Split markdown into {heading: body} for every heading in the text"""
+    headings = list(SECTION_HEADING.finditer(text))
+    sections = {}
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        title = heading.group(1).strip('*: ')
+        sections[title] = text[heading.end():end].strip()
+    return sections
+
+
+def format_categories(categories: Dict[str, Dict[str, int]]) -> str:
+    """Format detected categories with their strongest evidence"""
+    if not categories:
+        return 'No clear patterns detected'
+
+    lines = []
+    for category, hits in categories.items():
+        evidence = ', '.join(f"{keyword} ×{count}" for keyword, count in list(hits.items())[:5])
+        lines.append(f"- **{category}** ({evidence})")
+    return "\n".join(lines)
+
+
+def render_rules_body(result: PersonaResult) -> str:
+    """Render the rule-based persona sections"""
+    ranked_lines = "\n".join(f"{i}. {activity.describe()}" for i, activity in enumerate(result.subreddits, 1))
+
+    persona = f"""
+# Reddit User Persona Analysis for u/{result.username}
+
+## Overview
+- **Total Posts**: {result.posts}
+- **Total Comments**: {result.comments}
+- **Active Subreddits**: {result.active_subreddits}
+- **Total Word Count**: {result.word_count}
+
+## Detected Interests
+{format_categories(result.interests)}
+
+## Personality Indicators
+{format_categories(result.personality)}
+
+## Estimated Age Group
+{format_categories(result.age_group)}
+
+## Top Subreddits
+{ranked_lines or 'N/A'}
+
+## Communication Analysis
+- Average words per post: {result.word_count // max(result.item_count, 1)}
+- Most active in: {result.subreddits[0].subreddit if result.subreddits else 'N/A'}
+
+{render_activity_stats(result.activity)}
+## Content Examples
+"""
+
+    for i, example in enumerate(result.examples):
+        persona += f"\n**Example {i+1}** ({example.post_type} in r/{example.subreddit}):\n"
+        persona += f"Title: {example.title}\n"
+        persona += f"Content: {example.content[:AnalysisConfig.CONTENT_PREVIEW_LIMIT]}...\n"
+        persona += f"Source: {example.url}\n"
+
+    return persona
+
+
+def render_duplicates(result: PersonaResult) -> str:
+    """Note on the header line of the items dropped as duplicates, if any"""
+    if not result.duplicates_removed:
+        return ""
+    return f" ({result.duplicates_removed} duplicates removed)"
+
+
+def render_header(result: PersonaResult) -> str:
+    """Render the metadata header that starts every persona report"""
+    timestamp = datetime.fromisoformat(result.generated_at).strftime("%Y-%m-%d %H:%M:%S")
+    return f"""# Reddit User Persona Analysis
+**User**: u/{result.username}
+**Profile URL**: {result.profile_url}
+**Analysis Date**: {timestamp}
+**Data Points Analyzed**: {result.item_count} posts and comments{render_duplicates(result)}
+
+---
+
+"""
+
+
+def render_markdown(result: PersonaResult) -> str:
+    """Render the full persona report: metadata header plus the LLM or rule-based body"""
+    if not result.item_count:
+        return f"No data found for user {result.username}"
+
+    return render_header(result) + (result.llm_text if result.llm_text else render_rules_body(result))
+
+
+class JsonlWriter:
+    """Thread-safe, buffered, append-only JSONL writer for persona results"""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8', buffering=buffer_size)
+        self.lock = threading.Lock()
+        self.written = 0
+
+    def write(self, result: PersonaResult):
+        line = result.to_json() + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.written += 1
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path: str) -> Iterator[PersonaResult]:
+    """Yield the PersonaResult objects stored in a JSONL file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield PersonaResult.from_json(line)
@@ -0,0 +1,124 @@
+"""
+Persistent on-disk cache of scraped Reddit posts and comments
+
+Records are stored in SQLite keyed by username and Reddit fullname, so a
+repeat analysis of a known user only needs the items newer than the cached
+created_utc high-water mark of each listing.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models import REDDIT_URL, RedditPost
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    username TEXT NOT NULL,
+    id TEXT NOT NULL,
+    post_type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    subreddit TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_utc REAL NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (username, id)
+);
+CREATE INDEX IF NOT EXISTS posts_by_user_time
+    ON posts (username, post_type, created_utc);
+"""
+
+
+class PostStore:
+    """SQLite-backed store of RedditPost records per user"""
+
+    def __init__(self, path: str = "reddit_posts.db"):
+        self.path = path
+        # One connection shared by batch worker threads, serialized by a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def high_water_marks(self, username: str) -> Dict[str, float]:
+        """Return the newest cached created_utc of each post_type for a user"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT post_type, MAX(created_utc) FROM posts WHERE username = ? GROUP BY post_type",
+                (username.lower(),)
+            ).fetchall()
+        return {post_type: created_utc for post_type, created_utc in rows}
+
+    def count_since(self, username: str, created_utc: float) -> int:
+        """Return how many cached items of a user are newer than created_utc"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM posts WHERE username = ? AND created_utc > ?",
+                (username.lower(), created_utc)
+            ).fetchone()[0]
+
+    def add_posts(self, username: str, posts: Iterable[RedditPost]) -> int:
+        """Insert or update posts for a user and return how many were written"""
+        rows = [
+            (username.lower(), p.id or p.permalink, p.post_type, p.raw_title, p.content,
+             p.subreddit, p.score, p.created_utc, p.url)
+            for p in posts
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO posts "
+                "(username, id, post_type, title, content, subreddit, score, created_utc, url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def iter_posts(self, username: str, limit: Optional[int] = None,
+                   chunk_size: int = 256) -> Iterator[RedditPost]:
+        """Yield cached posts then comments, newest first, up to limit of each type
+
+        Rows are fetched in chunks so long histories are never held in memory.
+        Each chunk is its own query, run under the lock and resumed after the
+        last row yielded, so no cursor stays open on the shared connection
+        while other threads write to it.
+        """
+        for post_type in ("post", "comment"):
+            remaining = limit
+            after = None  # (created_utc, id) of the last row yielded
+            while remaining is None or remaining > 0:
+                query = ("SELECT title, content, subreddit, score, created_utc, url, post_type, id "
+                         "FROM posts WHERE username = ? AND post_type = ?")
+                params = [username.lower(), post_type]
+                if after is not None:
+                    query += " AND (created_utc < ? OR (created_utc = ? AND id < ?))"
+                    params += [after[0], after[0], after[1]]
+                query += " ORDER BY created_utc DESC, id DESC LIMIT ?"
+                params.append(chunk_size if remaining is None else min(chunk_size, remaining))
+
+                with self.lock:
+                    rows = self.conn.execute(query, params).fetchall()
+                if not rows:
+                    break
+                if remaining is not None:
+                    remaining -= len(rows)
+                after = rows[-1][4], rows[-1][7]
+                for title, content, subreddit, score, created_utc, url, row_type, post_id in rows:
+                    yield RedditPost(
+                        raw_title="" if row_type == "comment" else title,
+                        content=content,
+                        subreddit=subreddit,
+                        score=score,
+                        created_utc=created_utc,
+                        permalink=url[len(REDDIT_URL):] if url.startswith(REDDIT_URL) else url,
+                        post_type=row_type,
+                        id=post_id
+                    )
+
+    def load_posts(self, username: str, limit: Optional[int] = None) -> List[RedditPost]:
+        """Return cached posts then comments, newest first, up to limit of each type"""
+        return list(self.iter_posts(username, limit))
+
+    def close(self):
+        """Close the underlying database connection"""
+        self.conn.close()
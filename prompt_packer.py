@@ -0,0 +1,149 @@
+"""
+Token-budget-aware prompt packing for OpenAI analysis
+
+Instead of sending a fixed number of truncated posts, PromptPacker counts
+tokens locally and greedily fills a token budget with the most informative
+items: well-received, recent and substantive posts, with a diminishing
+return for every additional item from the same subreddit so the evidence
+covers as many communities as possible.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from config import AnalysisConfig
+from models import RedditPost
+
+# Separator placed between packed items
+ITEM_SEPARATOR = "\n\n"
+
+
+class TokenCounter:
+    """Count tokens with tiktoken when available, else estimate from length"""
+
+    # Average characters per token for English text
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str = AnalysisConfig.OPENAI_MODEL):
+        self.encoding = None
+        try:
+            # Imported here since loading tiktoken slows down startup
+            import tiktoken
+        except ImportError:  # Fall back to a character-based estimate
+            return
+        try:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads its BPE files on first use, which fails offline
+            print(f"⚠️  Tokenizer unavailable ({e}); estimating token counts")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return max(1, math.ceil(len(text) / self.CHARS_PER_TOKEN))
+
+
+@dataclass
+class PackedPrompt:
+    """Packed evidence for a prompt plus accounting of what was left out"""
+    content: str
+    items: List[RedditPost]
+    tokens_used: int
+    items_dropped: int
+    tokens_dropped: int
+    # Whether items were dropped for lack of tokens rather than for the item cap
+    over_budget: bool = False
+
+    @property
+    def items_used(self) -> int:
+        return len(self.items)
+
+
+class PromptPacker:
+    """Greedily pack the most informative posts into a token budget"""
+
+    def __init__(self, token_budget: int = AnalysisConfig.OPENAI_PROMPT_TOKEN_BUDGET,
+                 max_items: int = AnalysisConfig.OPENAI_ANALYSIS_LIMIT,
+                 item_char_limit: int = AnalysisConfig.OPENAI_ITEM_CHAR_LIMIT,
+                 model: str = AnalysisConfig.OPENAI_MODEL):
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.item_char_limit = item_char_limit
+        self.counter = TokenCounter(model)
+        self.separator_tokens = self.counter.count(ITEM_SEPARATOR)
+
+    def format_item(self, post: RedditPost) -> str:
+        """Render one post the way it appears in the prompt"""
+        return f"[{post.post_type.upper()}] in r/{post.subreddit}: {post.title}\n{post.content[:self.item_char_limit]}"
+
+    def informativeness(self, posts: Sequence[RedditPost]) -> List[float]:
+        """Base value of each post from its score, recency and length"""
+        times = [post.created_utc for post in posts]
+        oldest, newest = min(times), max(times)
+        span = (newest - oldest) or 1.0
+        return [
+            math.log1p(max(post.score, 0))
+            + 2.0 * (post.created_utc - oldest) / span
+            + 0.5 * math.log1p(len(post.content.split()))
+            for post in posts
+        ]
+
+    def rank(self, posts: Sequence[RedditPost]) -> List[int]:
+        """Order post indices by value, discounting repeats of a subreddit
+
+        Uses lazy greedy selection: a post's value only drops when another
+        post from its subreddit is picked, so stale heap entries are simply
+        re-scored and pushed back.
+        """
+        if not posts:
+            return []
+
+        base = self.informativeness(posts)
+        picked_per_subreddit: Dict[str, int] = {}
+        heap = [(-value, i, 0) for i, value in enumerate(base)]
+        heapq.heapify(heap)
+        order = []
+
+        while heap:
+            _, i, seen = heapq.heappop(heap)
+            picked = picked_per_subreddit.get(posts[i].subreddit, 0)
+            if seen != picked:
+                heapq.heappush(heap, (-base[i] / (1 + picked), i, picked))
+                continue
+            order.append(i)
+            picked_per_subreddit[posts[i].subreddit] = picked + 1
+
+        return order
+
+    def pack(self, posts: Sequence[RedditPost]) -> PackedPrompt:
+        """Fill the token budget with the highest-ranked posts that fit"""
+        chunks = []
+        items = []
+        tokens_used = 0
+        tokens_dropped = 0
+        over_budget = False
+
+        for i in self.rank(posts):
+            text = self.format_item(posts[i])
+            tokens = self.counter.count(text) + self.separator_tokens
+            if len(items) < self.max_items and tokens_used + tokens <= self.token_budget:
+                chunks.append(text)
+                items.append(posts[i])
+                tokens_used += tokens
+            else:
+                over_budget = over_budget or len(items) < self.max_items
+                tokens_dropped += tokens
+
+        return PackedPrompt(
+            content=ITEM_SEPARATOR.join(chunks),
+            items=items,
+            tokens_used=tokens_used,
+            items_dropped=len(posts) - len(items),
+            tokens_dropped=tokens_dropped,
+            over_budget=over_budget,
+        )
@@ -0,0 +1,63 @@
+"""
+Prompt text shared by the OpenAI analysis modes
+"""
+
+from typing import List, Tuple
+
+SYSTEM_PROMPT = "You are an expert in personality analysis and social media behavior. Provide detailed, evidence-based personality assessments."
+
+# (section title, optional qualifier) in the order they appear in a persona
+PERSONA_SECTIONS: List[Tuple[str, str]] = [
+    ("Interests and Hobbies", ""),
+    ("Communication Style and Tone", ""),
+    ("Estimated Age Group", ""),
+    ("Possible Profession or Field", ""),
+    ("Political Opinions", "(if evident)"),
+    ("Personality Traits", ""),
+    ("Community Involvement", ""),
+    ("Overall Assessment", ""),
+]
+
+
+def section_list() -> str:
+    """Numbered markdown list of the persona sections"""
+    return "\n".join(f"{i}. **{title}** {qualifier}".rstrip()
+                     for i, (title, qualifier) in enumerate(PERSONA_SECTIONS, 1))
+
+
+MAP_SYSTEM_PROMPT = "You are an expert in personality analysis and social media behavior. Summarize evidence concisely and quote it faithfully."
+
+MAP_PROMPT = """
+Below is one chunk of the Reddit history of user '{username}'.
+Summarize what it reveals about the user for each of these aspects, skipping aspects with no evidence:
+{sections}
+
+Keep the most telling short quotes verbatim with their subreddit, as they will be cited later.
+
+Reddit Content:
+{content}
+"""
+
+REDUCE_PROMPT = """
+The following are partial analyses of different chunks of the Reddit history of user '{username}'.
+Combine them into one detailed personality persona, resolving contradictions in favour of
+the evidence that appears most often.
+
+Partial analyses:
+{summaries}
+
+Please provide a comprehensive analysis including:
+{sections}
+
+For each section, include specific quotes or examples from their posts/comments as evidence.
+Format your response in a clear, structured way.
+"""
+
+SECTION_PROMPT = """
+Analyze the following Reddit posts and comments from user '{username}' and write only the
+section titled "{title}"{qualifier} of their personality persona.
+Cite specific quotes or examples from the content as evidence. Do not repeat the section title.
+
+Reddit Content:
+{content}
+"""
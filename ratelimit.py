@@ -0,0 +1,226 @@
+"""
+Rate limiting and retry scheduling for the Reddit User Persona Analyzer
+
+A single limiter instance can be shared by many worker threads so that the
+combined request rate stays within the API quota. RequestScheduler keeps one
+limiter per API and wraps every call with retries: exponential backoff with
+jitter, honouring Retry-After and x-ratelimit-* headers so that a throttled
+response pauses all workers rather than failing the user being analyzed.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+import urllib.error
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from config import APIConfig
+from instrumentation import METRICS
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Transient network errors raised by the SDKs, matched by name so this module
+# does not have to import them
+RETRYABLE_EXCEPTION_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'RequestException',
+    'ServerError', 'TooManyRequests', 'ClientConnectionError', 'ServerTimeoutError',
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing a fixed number of calls per minute"""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """Create a bucket refilling at rate_per_minute with room for burst calls"""
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(int(burst), 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return the seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            pause = max(self.blocked_until - now, 0.0)
+            if self.tokens >= 0:
+                return pause
+            # Callers queue up behind each other by going into debt
+            return max(-self.tokens / self.rate, pause)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for the given number of seconds"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait until a call is allowed without blocking the event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RetryableResponse(Exception):
+    """Raised for an HTTP response whose status should be retried"""
+
+    def __init__(self, response: Any, status: int):
+        super().__init__(f"HTTP {status}")
+        self.response = response
+        self.status = status
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse '20', '1.5s', '6m0s' or '250ms' style durations into seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|s|m|h)', value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header"""
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    seconds = _parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _exception_headers(exc: Exception) -> Mapping[str, str]:
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(exc, 'headers', None)
+    return headers or {}
+
+
+def _exception_status(exc: Exception) -> Optional[int]:
+    for source in (exc, getattr(exc, 'response', None)):
+        for attr in ('status', 'status_code', 'code'):
+            status = getattr(source, attr, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+
+class RequestScheduler:
+    """Shared per-API rate limiting with retries and exponential backoff"""
+
+    def __init__(self, limiters: Dict[str, RateLimiter],
+                 max_attempts: int = APIConfig.MAX_RETRY_ATTEMPTS,
+                 base_delay: float = APIConfig.RETRY_WAIT_TIME,
+                 max_delay: float = 60.0):
+        self.limiters = limiters
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries: Dict[str, int] = {api: 0 for api in limiters}
+        self.lock = threading.Lock()
+
+    def is_retryable(self, exc: Exception) -> bool:
+        """Whether a failed call is worth retrying"""
+        status = _exception_status(exc)
+        if status is not None:
+            return status in RETRYABLE_STATUS
+        if isinstance(exc, (ConnectionError, TimeoutError, urllib.error.URLError)):
+            return True
+        return type(exc).__name__ in RETRYABLE_EXCEPTION_NAMES
+
+    def backoff(self, attempt: int, exc: Exception) -> float:
+        """Delay before the next attempt: Retry-After if given, else jittered exponential"""
+        retry_after = _retry_after(_exception_headers(exc))
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * random.uniform(0.5, 1.5)
+
+    def observe_headers(self, api: str, headers: Mapping[str, str]):
+        """Pause an API's limiter when response headers say the quota is used up
+
+        Understands Reddit's x-ratelimit-remaining/reset and OpenAI's
+        x-ratelimit-remaining-requests/reset-requests.
+        """
+        if not headers:
+            return
+        for remaining_key, reset_key in (('x-ratelimit-remaining', 'x-ratelimit-reset'),
+                                         ('x-ratelimit-remaining-requests', 'x-ratelimit-reset-requests')):
+            remaining = headers.get(remaining_key)
+            reset = headers.get(reset_key)
+            if remaining is None or reset is None:
+                continue
+            try:
+                exhausted = float(remaining) < 1
+            except ValueError:
+                continue
+            seconds = _parse_duration(reset)
+            if exhausted and seconds:
+                self.limiters[api].pause(seconds)
+
+    def _record_failure(self, api: str, attempt: int, exc: Exception) -> float:
+        """Count a retry and return how long to wait, pausing the API if throttled"""
+        delay = self.backoff(attempt, exc)
+        with self.lock:
+            self.retries[api] = self.retries.get(api, 0) + 1
+        METRICS.inc("persona_retries_total", api=api)
+        if _exception_status(exc) == 429:
+            self.limiters[api].pause(delay)
+        print(f"⏳ {api} request failed ({exc}), retrying in {delay:.1f}s...")
+        return delay
+
+    def call(self, api: str, fn: Callable, *args, **kwargs):
+        """Call fn under the API's rate limit, retrying transient failures"""
+        limiter = self.limiters[api]
+        for attempt in range(self.max_attempts):
+            limiter.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not self.is_retryable(e):
+                    raise
+                time.sleep(self._record_failure(api, attempt, e))
+
+    async def call_async(self, api: str, fn: Callable, *args, **kwargs):
+        """Await fn(*args, **kwargs) under the API's rate limit with retries"""
+        limiter = self.limiters[api]
+        for attempt in range(self.max_attempts):
+            await limiter.acquire_async()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not self.is_retryable(e):
+                    raise
+                await asyncio.sleep(self._record_failure(api, attempt, e))
+
+
+def create_scheduler(reddit_rate_limit: float = APIConfig.REDDIT_RATE_LIMIT,
+                     openai_rate_limit: float = APIConfig.OPENAI_RATE_LIMIT) -> RequestScheduler:
+    """Build a scheduler with the Reddit and OpenAI limits from APIConfig"""
+    return RequestScheduler({
+        'reddit': RateLimiter(reddit_rate_limit),
+        'openai': RateLimiter(openai_rate_limit),
+    })
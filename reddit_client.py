@@ -0,0 +1,64 @@
+"""
+PRAW client wired to the shared request scheduler
+
+Kept out of main.py so that importing the analyzer does not pay for
+importing praw; RedditUserAnalyzer imports this module the first time it
+actually talks to Reddit.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import praw
+import prawcore
+
+from instrumentation import stage
+from ratelimit import RETRYABLE_STATUS, RequestScheduler, RetryableResponse
+
+
+class ThrottledRequestor(prawcore.Requestor):
+    """PRAW requestor sending every HTTP call through a shared RequestScheduler
+
+    Throttled and server-error responses are retried with backoff before
+    PRAW gets to see them.
+    """
+
+    def __init__(self, *args, scheduler: Optional[RequestScheduler] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+
+    def request(self, *args, **kwargs):
+        with stage("reddit_request") as span:
+            response = self._send(*args, **kwargs)
+            span.add("bytes", len(response.content))
+            return response
+
+    def _send(self, *args, **kwargs):
+        if not self.scheduler:
+            return super().request(*args, **kwargs)
+
+        def send():
+            response = super(ThrottledRequestor, self).request(*args, **kwargs)
+            self.scheduler.observe_headers('reddit', response.headers)
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableResponse(response, response.status_code)
+            return response
+
+        try:
+            return self.scheduler.call('reddit', send)
+        except RetryableResponse as e:
+            # Out of retries: let PRAW raise its usual error for this response
+            return e.response
+
+
+def create_reddit(scheduler: Optional[RequestScheduler] = None,
+                  settings: Optional[Dict[str, Any]] = None) -> praw.Reddit:
+    """praw.Reddit client using the credentials from the environment"""
+    return praw.Reddit(
+        client_id=os.getenv('REDDIT_CLIENT_ID'),
+        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+        user_agent=os.getenv('REDDIT_USER_AGENT', 'PersonaAnalyzer/1.0'),
+        requestor_class=ThrottledRequestor,
+        requestor_kwargs={'scheduler': scheduler},
+        **(settings or {})
+    )
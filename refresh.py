@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Scheduled incremental re-profiling of a watchlist
+
+Meant to run from cron. Instead of regenerating every watched persona,
+each user is first probed with a single request for their newest post or
+comment. Users whose newest item is unchanged are skipped. For the others,
+only the items newer than the post store's history are scraped (the
+delta), and the persona is regenerated from the stored history once
+RefreshConfig.MIN_NEW_ITEMS new items have accumulated since it was last
+written. A refresh therefore costs one request per quiet user, and scraping
+and analysis in proportion to new activity.
+
+Users are probed in order of expected new activity (items per day over
+the cached history times the time since their last probe), so a --budget
+of probes goes to the users most likely to have changed.
+
+Usage:
+    python refresh.py watchlist.txt --output-dir personas
+    python refresh.py watchlist.txt --budget 500 --min-new-items 10 --rules-only
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass, fields
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from batch import BatchRunner, iter_profile_urls
+from config import AnalysisConfig, APIConfig, CacheConfig, RefreshConfig
+from instrumentation import METRICS
+from post_store import PostStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watched_users (
+    username TEXT PRIMARY KEY COLLATE NOCASE,
+    newest_id TEXT,
+    pending INTEGER NOT NULL,
+    items_per_day REAL NOT NULL,
+    probed_at REAL,
+    generated_at REAL
+);
+"""
+
+PROFILE_URL = "https://www.reddit.com/user/{username}/"
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass
+class WatchedUser:
+    """Refresh state of one watched user"""
+    username: str
+    newest_id: Optional[str] = None  # fullname of the newest item at the last probe
+    pending: int = 0  # new items scraped since the persona was last generated
+    items_per_day: float = 0.0
+    probed_at: Optional[float] = None
+    generated_at: Optional[float] = None
+
+    def expected_new_items(self, now: float) -> float:
+        """New items pending or expected since the last probe; never probed users come first"""
+        if self.probed_at is None:
+            return math.inf
+        return self.pending + self.items_per_day * (now - self.probed_at) / SECONDS_PER_DAY
+
+
+class RefreshState:
+    """SQLite-backed refresh state of the watched users"""
+
+    def __init__(self, path: str = RefreshConfig.STATE_PATH):
+        self.path = path
+        # One connection shared by the refresh worker threads, serialized by a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def load(self, usernames: Iterable[str]) -> List[WatchedUser]:
+        """State of each user, with defaults for users not seen before"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(field.name for field in fields(WatchedUser))} FROM watched_users"
+            ).fetchall()
+        known = {row[0].lower(): WatchedUser(*row) for row in rows}
+        return [known.get(username.lower()) or WatchedUser(username) for username in usernames]
+
+    def save(self, user: WatchedUser):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO watched_users VALUES (?, ?, ?, ?, ?, ?)", astuple(user))
+
+    def close(self):
+        """Close the underlying database connection"""
+        self.conn.close()
+
+
+def username_of(entry: str) -> str:
+    """Username of a watchlist line: a profile URL, u/name or a bare name"""
+    match = re.search(r'reddit\.com/u(?:ser)?/([^/?#]+)', entry)
+    if match:
+        return match.group(1)
+    return entry[2:] if entry.startswith('u/') else entry
+
+
+class RefreshRunner(BatchRunner):
+    """Probe watched users and regenerate the personas with enough new activity"""
+
+    def __init__(self, state: RefreshState, store: PostStore,
+                 min_new_items: int = RefreshConfig.MIN_NEW_ITEMS,
+                 activity_window_days: float = RefreshConfig.ACTIVITY_WINDOW_DAYS, **kwargs):
+        super().__init__(store=store, **kwargs)
+        self.state = state
+        self.min_new_items = max(min_new_items, 1)
+        self.activity_window_days = activity_window_days
+
+    def check(self, user: WatchedUser) -> Tuple[str, Optional[str]]:
+        """Refresh one user and return (outcome, filename or error)
+
+        The outcome is 'unchanged', 'pending' (new items below the
+        threshold), 'regenerated' or 'failed'. A failed regeneration keeps
+        its pending items, so the next run tries again.
+        """
+        analyzer = self._analyzer()
+        now = time.time()
+        try:
+            newest = analyzer.probe_newest(user.username)
+            if newest is None or newest[0] == user.newest_id:
+                outcome, detail = 'unchanged', None
+            else:
+                since = self.store.high_water_marks(user.username)
+                user.pending += self.store.add_posts(user.username,
+                                                     analyzer.iter_user_data(user.username, since=since))
+                user.newest_id = newest[0]
+                window = self.activity_window_days * SECONDS_PER_DAY
+                user.items_per_day = self.store.count_since(user.username, now - window) / self.activity_window_days
+                outcome, detail = 'pending', None
+        except Exception as e:
+            return 'failed', str(e)
+        user.probed_at = now
+
+        # Also retried when nothing changed but an earlier regeneration failed
+        due = user.generated_at is None or user.pending >= self.min_new_items
+        if newest is not None and due:
+            # The store now holds the delta, so the persona is built without scraping again
+            _, filename, error = self.process(PROFILE_URL.format(username=user.username), cached_only=True)
+            if error:
+                outcome, detail = 'failed', error
+            else:
+                outcome, detail = 'regenerated', filename
+                user.pending = 0
+                user.generated_at = now
+
+        self.state.save(user)
+        return outcome, detail
+
+    def refresh(self, usernames: Iterable[str], budget: Optional[int] = None) -> Dict[str, int]:
+        """Refresh up to budget users, most active first, and count the outcomes"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        users = sorted(self.state.load(usernames), key=lambda user: user.expected_new_items(now), reverse=True)
+        if budget is not None:
+            users = users[:budget]
+
+        outcomes: Counter = Counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for user, (outcome, detail) in zip(users, executor.map(self.check, users)):
+                outcomes[outcome] += 1
+                METRICS.inc("persona_refresh_users_total", outcome=outcome)
+                if outcome == 'regenerated':
+                    print(f"✅ u/{user.username} -> {detail}")
+                elif outcome == 'failed':
+                    print(f"❌ u/{user.username}: {detail}")
+                elif outcome == 'pending':
+                    print(f"⏳ u/{user.username}: {user.pending} new items, waiting for {self.min_new_items}")
+        return dict(outcomes)
+
+
+def main(argv=None):
+    """Command line entry point for watchlist refreshes"""
+    parser = argparse.ArgumentParser(description="Regenerate the personas of watched users with new activity")
+    parser.add_argument('watchlist', nargs='?', default='-',
+                        help="file with one username or profile URL per line ('-' or omitted for stdin)")
+    parser.add_argument('--output-dir', default='.', help="directory for {username}_persona.txt files")
+    parser.add_argument('--min-new-items', type=int, default=RefreshConfig.MIN_NEW_ITEMS,
+                        help="new posts and comments needed to regenerate a persona")
+    parser.add_argument('--budget', type=int, default=None,
+                        help="probe at most this many users, those with the highest activity rate first")
+    parser.add_argument('--workers', type=int, default=RefreshConfig.WORKERS,
+                        help="users refreshed concurrently")
+    parser.add_argument('--rate-limit', type=float, default=APIConfig.REDDIT_RATE_LIMIT,
+                        help="Reddit requests per minute shared by all workers")
+    parser.add_argument('--rules-only', action='store_true',
+                        help="skip OpenAI and use rule-based analysis only (openai is never imported)")
+    parser.add_argument('--classifier', choices=['keywords', 'embeddings'], default=AnalysisConfig.RULE_CLASSIFIER,
+                        help="how rule-based analysis detects interests, personality and age")
+    parser.add_argument('--scrape-backend', choices=['praw', 'async'], default=APIConfig.REDDIT_SCRAPE_BACKEND,
+                        help="scrape each user's new items one listing after the other (praw) or concurrently (async)")
+    parser.add_argument('--state', default=RefreshConfig.STATE_PATH, help="SQLite refresh state file")
+    parser.add_argument('--post-store', default=CacheConfig.POST_STORE_PATH,
+                        help="SQLite cache of scraped posts the deltas are merged into")
+    parser.add_argument('--cohort-index', default=CacheConfig.COHORT_INDEX_PATH,
+                        help="SQLite index of analyzed users for cohort_index.py queries ('' to disable)")
+    args = parser.parse_args(argv)
+
+    print("🚀 Reddit User Persona Analyzer (watchlist refresh)")
+    print("=" * 50)
+
+    missing_vars = [var for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET') if not os.getenv(var)]
+    if missing_vars:
+        print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
+        return 1
+
+    if args.watchlist == '-':
+        usernames = [username_of(entry) for entry in iter_profile_urls(sys.stdin)]
+    else:
+        with open(args.watchlist, encoding='utf-8') as f:
+            usernames = [username_of(entry) for entry in iter_profile_urls(f)]
+
+    state = RefreshState(args.state)
+    from cohort_index import CohortIndex
+    cohort_index = CohortIndex(args.cohort_index) if args.cohort_index else None
+    runner = RefreshRunner(state, PostStore(args.post_store), min_new_items=args.min_new_items,
+                           workers=args.workers, output_dir=args.output_dir, rate_limit=args.rate_limit,
+                           rules_only=args.rules_only, rule_classifier=args.classifier,
+                           cohort_index=cohort_index, scrape_backend=args.scrape_backend)
+    try:
+        outcomes = runner.refresh(usernames, args.budget)
+    finally:
+        state.close()
+        if cohort_index:
+            cohort_index.compile()
+            cohort_index.close()
+
+    print(f"\n🔄 Refresh complete: {sum(outcomes.values())} of {len(usernames)} users probed, "
+          f"{outcomes.get('unchanged', 0)} unchanged, {outcomes.get('pending', 0)} below the threshold, "
+          f"{outcomes.get('regenerated', 0)} regenerated, {outcomes.get('failed', 0)} failed")
+    print(f"🔁 Retries: {runner.scheduler.retries}")
+    return 0 if not outcomes.get('failed') else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
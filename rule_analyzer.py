@@ -0,0 +1,137 @@
+"""
+Streaming rule-based persona analysis
+
+StreamingRuleAnalyzer consumes RedditPost objects one at a time and keeps
+only incremental counters (word counts, subreddit activity, keyword hits)
+plus a small reservoir of the highest-scoring examples, and appends the
+numeric fields of each item to models.PostColumns for the
+vectorized statistics in activity_stats. Text is never retained, so memory
+grows by a few bytes per item, and posts can be analyzed while they are
+still being scraped.
+
+With an EmbeddingClassifier, categories are detected from post embeddings
+instead of keyword hits; posts are then buffered only until the next
+classification batch.
+"""
+
+import heapq
+import itertools
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from activity_index import ActivityIndex
+from activity_stats import compute_activity_stats
+from config import AnalysisConfig, OutputConfig
+from embedding_classifier import EmbeddingClassifier
+from keyword_matcher import detect_categories, get_default_matcher
+from models import PostColumns, RedditPost
+from persona_result import ExamplePost, PersonaResult, render_rules_body
+
+
+class StreamingRuleAnalyzer:
+    """Incremental rule-based analyzer that never keeps post text"""
+
+    def __init__(self, max_examples: int = OutputConfig.MAX_EXAMPLE_POSTS,
+                 classifier: Optional[EmbeddingClassifier] = None):
+        self.matcher = get_default_matcher()
+        self.category_scorer = classifier.scorer() if classifier else None
+        self.max_examples = max_examples
+        self.total_posts = 0
+        self.total_comments = 0
+        self.word_count = 0
+        self.activity = ActivityIndex()
+        self.columns = PostColumns()
+        self.keyword_hits: Counter = Counter()
+        # Min-heap of (score, sequence, post) holding the top examples by score
+        self.examples: List[Tuple[int, int, RedditPost]] = []
+        self._sequence = itertools.count()
+        # Time spent in update() and result(), excluding whatever produces the posts
+        self.seconds = 0.0
+
+    @property
+    def total_items(self) -> int:
+        return self.total_posts + self.total_comments
+
+    def update(self, post: RedditPost):
+        """Fold one post or comment into the running counters"""
+        started = time.perf_counter()
+        self._fold(post)
+        self.seconds += time.perf_counter() - started
+
+    def _fold(self, post: RedditPost):
+        if post.post_type == "post":
+            self.total_posts += 1
+        else:
+            self.total_comments += 1
+
+        text = post.title + " " + post.content
+        self.activity.add(post)
+        self.columns.append(post)
+        self.word_count += self.columns.word_counts[-1]
+        if self.category_scorer is not None:
+            self.category_scorer.add(text, post.subreddit)
+        else:
+            self.keyword_hits.update(self.matcher.count(text))
+
+        # Negated sequence keeps the earliest (newest) post on score ties
+        entry = (post.score, -next(self._sequence), post)
+        if len(self.examples) < self.max_examples:
+            heapq.heappush(self.examples, entry)
+        elif entry[:2] > self.examples[0][:2]:
+            heapq.heapreplace(self.examples, entry)
+
+    def consume(self, posts: Iterable[RedditPost]) -> 'StreamingRuleAnalyzer':
+        """Fold every post from an iterable (or generator) into the counters"""
+        for post in posts:
+            self.update(post)
+        return self
+
+    def top_examples(self) -> List[RedditPost]:
+        """Return the reservoir of example posts, highest score first"""
+        return [post for _, _, post in sorted(self.examples, key=lambda entry: entry[:2], reverse=True)]
+
+    def result(self, username: str, profile_url: str = "") -> PersonaResult:
+        """Build the structured persona from the accumulated counters"""
+        started = time.perf_counter()
+        result = self._build_result(username, profile_url)
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def _build_result(self, username: str, profile_url: str) -> PersonaResult:
+        category_hits = self.matcher.categorize(self.keyword_hits)
+
+        def detected(table: str, min_keywords: int, limit: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+            if self.category_scorer is not None:
+                # Embeddings count supporting posts, with thresholds of their own
+                return self.category_scorer.detect(table, limit)
+            categories = detect_categories(category_hits[table], min_keywords=min_keywords)[:limit]
+            return {
+                category: dict(sorted(category_hits[table][category].items(), key=lambda item: item[1], reverse=True))
+                for category in categories
+            }
+
+        return PersonaResult(
+            username=username,
+            profile_url=profile_url,
+            item_count=self.total_items,
+            posts=self.total_posts,
+            comments=self.total_comments,
+            word_count=self.word_count,
+            active_subreddits=len(self.activity),
+            classifier=self.category_scorer.classifier.name if self.category_scorer else "keywords",
+            interests=detected('interests', 3),
+            personality=detected('personality', 2),
+            age_group=detected('age', 1, limit=1),
+            subreddits=self.activity.ranked(AnalysisConfig.MAX_SUBREDDITS_DISPLAY),
+            activity=compute_activity_stats(self.columns),
+            examples=[
+                ExamplePost(post_type=post.post_type, subreddit=post.subreddit, title=post.title,
+                            content=post.content, url=post.url, score=post.score)
+                for post in self.top_examples()
+            ],
+        )
+
+    def render(self, username: str) -> str:
+        """Render the rule-based persona from the accumulated counters"""
+        return render_rules_body(self.result(username))
@@ -0,0 +1,81 @@
+"""
+Concurrent per-section OpenAI analysis
+
+Instead of one long completion writing all eight persona sections in turn,
+every section of PERSONA_SECTIONS is requested with its own, smaller
+completion over the same packed evidence. The completions run concurrently,
+so wall-clock latency is that of the slowest section rather than the sum,
+and each one is cached on its own: a single section can be refreshed while
+the others keep coming from the response cache.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from config import AnalysisConfig
+from prompts import PERSONA_SECTIONS, SECTION_PROMPT, SYSTEM_PROMPT
+
+
+def find_section(name: str) -> str:
+    """Resolve a section number (1-8) or case-insensitive title to its title"""
+    titles = [title for title, _ in PERSONA_SECTIONS]
+    if name.isdigit() and 1 <= int(name) <= len(titles):
+        return titles[int(name) - 1]
+    for title in titles:
+        if title.lower() == name.strip().lower():
+            return title
+    raise ValueError(f"Unknown persona section: {name} (choose from {', '.join(titles)})")
+
+
+class SectionAnalyzer:
+    """Write persona sections with parallel completions and assemble them in order"""
+
+    def __init__(self, complete: Callable[..., str],
+                 fan_out: int = AnalysisConfig.SECTION_FAN_OUT,
+                 max_tokens: int = AnalysisConfig.SECTION_MAX_TOKENS):
+        """complete(system_prompt, prompt, max_tokens=..., refresh=...) runs one chat completion"""
+        self.complete = complete
+        self.fan_out = max(fan_out, 1)
+        self.max_tokens = max_tokens
+
+    def prompt(self, username: str, content: str, title: str) -> str:
+        qualifier = dict(PERSONA_SECTIONS)[title]
+        # The separating space goes with the qualifier, so the prompts (and
+        # their cache keys) of unqualified sections have no double space
+        qualifier = f" {qualifier}" if qualifier else ""
+        return SECTION_PROMPT.format(username=username, title=title, qualifier=qualifier, content=content)
+
+    def write_sections(self, username: str, content: str,
+                       refresh: Sequence[str] = ()) -> Dict[str, Optional[str]]:
+        """Write every section concurrently, {title: text or None if it failed}
+
+        Sections named in refresh bypass the response cache.
+        """
+        def write(title: str) -> Optional[str]:
+            try:
+                return self.complete(SYSTEM_PROMPT, self.prompt(username, content, title),
+                                     max_tokens=self.max_tokens, refresh=title in refresh)
+            except Exception as e:
+                print(f"⚠️  Section '{title}' failed: {e}")
+                return None
+
+        titles = [title for title, _ in PERSONA_SECTIONS]
+        with ThreadPoolExecutor(max_workers=min(self.fan_out, len(titles))) as executor:
+            return dict(zip(titles, executor.map(write, titles)))
+
+    @staticmethod
+    def assemble(sections: Dict[str, Optional[str]]) -> str:
+        """Numbered markdown persona with the sections in PERSONA_SECTIONS order"""
+        parts: List[str] = []
+        for i, (title, _) in enumerate(PERSONA_SECTIONS, 1):
+            text = sections.get(title)
+            parts.append(f"## {i}. {title}\n{text.strip() if text else '_Not available._'}")
+        return "\n\n".join(parts) + "\n"
+
+    def analyze(self, username: str, content: str, refresh: Sequence[str] = ()) -> str:
+        """Generate the persona from packed content, one completion per section"""
+        print(f"🧩 Writing {len(PERSONA_SECTIONS)} sections with up to {self.fan_out} parallel requests...")
+        sections = self.write_sections(username, content, refresh)
+        if not any(sections.values()):
+            raise Exception("every section failed")
+        return self.assemble(sections)
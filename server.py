@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+HTTP service mode for the Reddit User Persona Analyzer
+
+A long-running aiohttp server that keeps warm RedditUserAnalyzer instances
+(authenticated PRAW sessions and pooled OpenAI connections), so answering a
+request costs only the scraping and analysis. Concurrent requests for the
+same username share one in-flight computation, and finished personas are
+served from an in-memory TTL cache. /api/persona/{username}/stream sends
+the persona as server-sent events while OpenAI is still writing it.
+
+Usage:
+    python server.py --port 8000 --workers 4
+    curl http://127.0.0.1:8000/api/persona/kojied
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from config import APIConfig, CacheConfig, ServerConfig
+from instrumentation import METRICS
+from llm_cache import ResponseCache
+from main import RedditUserAnalyzer
+from persona_result import PersonaResult, render_markdown
+from post_store import PostStore
+from ratelimit import create_scheduler
+
+if TYPE_CHECKING:
+    from cohort_index import CohortIndex
+
+# Reddit usernames: 3-20 letters, digits, underscores or dashes
+USERNAME = re.compile(r'^[A-Za-z0-9_-]{3,20}$')
+
+
+class _Broadcast:
+    """Events of one streamed generation, replayed to every subscriber
+
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self):
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.finished = False
+
+    def publish(self, event: Optional[Tuple[str, Dict[str, Any]]]):
+        """Send an event to the subscribers; None ends the stream"""
+        if event is None:
+            self.finished = True
+        else:
+            self.events.append(event)
+        for subscriber in self.subscribers:
+            subscriber.put_nowait(event)
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield the events sent so far, then the rest as they arrive"""
+        subscriber: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            subscriber.put_nowait(event)
+        if self.finished:
+            subscriber.put_nowait(None)
+        else:
+            self.subscribers.append(subscriber)
+        try:
+            while True:
+                event = await subscriber.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+
+class PersonaService:
+    """Warm analyzers, request coalescing and a result cache behind the HTTP API"""
+
+    def __init__(self, workers: int = ServerConfig.WORKERS,
+                 cache_ttl: float = ServerConfig.RESULT_CACHE_TTL,
+                 cache_max_entries: int = ServerConfig.RESULT_CACHE_MAX_ENTRIES,
+                 store: Optional[PostStore] = None, cohort_index: Optional['CohortIndex'] = None,
+                 **analyzer_kwargs):
+        self.workers = max(workers, 1)
+        # Every generated persona is indexed for cohort queries
+        self.cohort_index = cohort_index
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="persona")
+        self.results = ResponseCache(cache_max_entries, cache_ttl)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        # Streamed generations, also registered in in_flight for plain requests to join
+        self.streams: Dict[str, _Broadcast] = {}
+        self.coalesced = 0
+
+        # PRAW clients are not thread-safe, so each worker checks one analyzer out
+        scheduler = create_scheduler()
+        response_cache = ResponseCache(CacheConfig.LLM_CACHE_MAX_ENTRIES, CacheConfig.LLM_CACHE_TTL)
+        self.analyzers: "queue.Queue[RedditUserAnalyzer]" = queue.Queue()
+        for _ in range(self.workers):
+            analyzer = RedditUserAnalyzer(scheduler=scheduler, store=store,
+                                          response_cache=response_cache, **analyzer_kwargs)
+            # Connect now so the first requests do not pay for imports and authentication
+            analyzer.setup_apis()
+            self.analyzers.put(analyzer)
+
+    def _generate(self, username: str) -> Dict[str, Any]:
+        """Build one persona on a worker thread"""
+        analyzer = self.analyzers.get()
+        try:
+            result = analyzer.build_result(f"https://www.reddit.com/user/{username}/")
+        finally:
+            self.analyzers.put(analyzer)
+        self._index(result)
+        return self._payload(result)
+
+    def _index(self, result: PersonaResult):
+        if self.cohort_index:
+            self.cohort_index.try_add(result)
+
+    @staticmethod
+    def _payload(result: PersonaResult) -> Dict[str, Any]:
+        return {
+            'username': result.username,
+            'persona': render_markdown(result),
+            'timestamp': result.generated_at,
+            'result': result.to_dict(),
+        }
+
+    async def persona(self, username: str) -> Dict[str, Any]:
+        """Return a cached persona, join an in-flight one, or start a new one"""
+        key = username.lower()
+        cached = self.results.get(key)
+        if cached is not None:
+            METRICS.inc("persona_server_requests_total", outcome="cached")
+            return {**json.loads(cached), 'cached': True}
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            METRICS.inc("persona_server_requests_total", outcome="coalesced")
+        else:
+            METRICS.inc("persona_server_requests_total", outcome="generated")
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self._generate, username)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+
+        # A client disconnecting must not cancel the computation other clients wait for
+        payload = await asyncio.shield(future)
+        return {**payload, 'cached': False}
+
+    def _stream(self, username: str, emit: Callable[[Tuple[str, Any]], None]):
+        """Generate one persona on a worker thread, emitting its events
+
+        Emits ('text', str) and ('reset', None) while the persona is written,
+        then ('done', payload) or ('error', exception), and finally None.
+        """
+        analyzer = self.analyzers.get()
+        try:
+            for event, value in analyzer.stream_result(f"https://www.reddit.com/user/{username}/"):
+                if event == 'result':
+                    self._index(value)
+                    emit(('done', self._payload(value)))
+                else:
+                    emit((event, value))
+        except Exception as e:
+            emit(('error', e))
+        finally:
+            self.analyzers.put(analyzer)
+            emit(None)
+
+    def _publish(self, key: str, future: asyncio.Future, event: Optional[Tuple[str, Any]]):
+        """Settle the shared future on the final event and pass the event to the stream's subscribers"""
+        broadcast = self.streams[key]
+        if event is None:
+            del self.streams[key]
+            if not future.done():
+                future.set_exception(RuntimeError("the persona stream ended without a result"))
+        else:
+            name, value = event
+            if name == 'done':
+                future.set_result(value)
+                event = name, {**value, 'cached': False}
+            elif name == 'error':
+                future.set_exception(value)
+                event = name, {'error': f"Error generating persona: {value}"}
+            else:
+                event = name, {'text': value} if name == 'text' else {}
+        broadcast.publish(event)
+
+    async def stream(self, username: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (event, data) pairs: 'text' chunks, 'reset', then 'done' or 'error'
+
+        Concurrent streams of one user share a single generation. Cached
+        personas and plain requests already in flight are sent as one chunk.
+        """
+        key = username.lower()
+        broadcast = self.streams.get(key)
+        if broadcast is None and (self.results.get(key) is not None or key in self.in_flight):
+            try:
+                payload = await self.persona(username)
+            except Exception as e:
+                yield 'error', {'error': f"Error generating persona: {e}"}
+                return
+            yield 'text', {'text': payload['persona']}
+            yield 'done', payload
+            return
+
+        if broadcast is not None:
+            self.coalesced += 1
+            METRICS.inc("persona_server_requests_total", outcome="coalesced")
+        else:
+            METRICS.inc("persona_server_requests_total", outcome="streamed")
+            loop = asyncio.get_running_loop()
+            broadcast = self.streams[key] = _Broadcast()
+            future = self.in_flight[key] = loop.create_future()
+            future.add_done_callback(lambda done: self._finish(key, done))
+            loop.run_in_executor(self.executor, self._stream, username,
+                                 lambda event: loop.call_soon_threadsafe(self._publish, key, future, event))
+        async for event in broadcast.subscribe():
+            yield event
+
+    def _finish(self, key: str, future: asyncio.Future):
+        self.in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.results.put(key, json.dumps(future.result(), ensure_ascii=False))
+
+    def close(self):
+        if sys.version_info >= (3, 9):
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            # Queued generations still run before the workers exit
+            self.executor.shutdown(wait=False)
+
+
+def _cors_headers(request: web.Request) -> Dict[str, str]:
+    return {
+        'Access-Control-Allow-Origin': request.app['cors_origin'],
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type',
+    }
+
+
+def _error(request: web.Request, status: int, message: str) -> web.Response:
+    return web.json_response({'error': message}, status=status, headers=_cors_headers(request))
+
+
+async def _respond(request: web.Request, username: str) -> web.Response:
+    if not USERNAME.match(username):
+        return _error(request, 400, f"Invalid Reddit username: {username}")
+    try:
+        payload = await request.app['service'].persona(username)
+    except Exception as e:
+        return _error(request, 502, f"Error generating persona: {e}")
+    return web.json_response(payload, headers=_cors_headers(request), dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+
+async def get_persona(request: web.Request) -> web.Response:
+    """GET /api/persona/{username}"""
+    return await _respond(request, request.match_info['username'])
+
+
+async def post_persona(request: web.Request) -> web.Response:
+    """POST /api/persona with {"profile_url": ...} or {"username": ...}"""
+    try:
+        body = await request.json()
+    except ValueError:
+        return _error(request, 400, "Request body must be JSON")
+
+    username = body.get('username')
+    if not username:
+        match = re.search(r'reddit\.com/(?:user|u)/([^/?#]+)', body.get('profile_url', ''))
+        if not match:
+            return _error(request, 400, "Could not extract username from profile_url")
+        username = match.group(1)
+    return await _respond(request, username)
+
+
+async def stream_persona(request: web.Request) -> web.StreamResponse:
+    """GET /api/persona/{username}/stream as server-sent events"""
+    username = request.match_info['username']
+    if not USERNAME.match(username):
+        return _error(request, 400, f"Invalid Reddit username: {username}")
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        **_cors_headers(request),
+    })
+    await response.prepare(request)
+    async for event, data in request.app['service'].stream(username):
+        await response.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+    await response.write_eof()
+    return response
+
+
+async def preflight(request: web.Request) -> web.Response:
+    return web.Response(status=204, headers=_cors_headers(request))
+
+
+async def health(request: web.Request) -> web.Response:
+    service = request.app['service']
+    return web.json_response({
+        'status': 'ok',
+        'in_flight': len(service.in_flight),
+        'coalesced': service.coalesced,
+        'cache': service.results.stats(),
+    })
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(text=METRICS.render_prometheus(), content_type='text/plain')
+
+
+def create_app(service: PersonaService, cors_origin: str = ServerConfig.CORS_ORIGIN) -> web.Application:
+    """Build the aiohttp application around a PersonaService"""
+    app = web.Application()
+    app['service'] = service
+    app['cors_origin'] = cors_origin
+    app.router.add_get('/api/persona/{username}', get_persona)
+    app.router.add_get('/api/persona/{username}/stream', stream_persona)
+    app.router.add_post('/api/persona', post_persona)
+    app.router.add_route('OPTIONS', '/api/persona', preflight)
+    app.router.add_route('OPTIONS', '/api/persona/{username}', preflight)
+    app.router.add_get('/healthz', health)
+    app.router.add_get('/metrics', metrics)
+
+    async def shutdown(app: web.Application):
+        app['service'].close()
+
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+def main(argv=None):
+    """Command line entry point for the persona HTTP service"""
+    parser = argparse.ArgumentParser(description="Serve Reddit personas over HTTP")
+    parser.add_argument('--host', default=ServerConfig.HOST)
+    parser.add_argument('--port', type=int, default=ServerConfig.PORT)
+    parser.add_argument('--workers', type=int, default=ServerConfig.WORKERS,
+                        help="warm analyzers, i.e. personas generated concurrently")
+    parser.add_argument('--cache-ttl', type=float, default=ServerConfig.RESULT_CACHE_TTL,
+                        help="seconds a finished persona is served from memory")
+    parser.add_argument('--cors-origin', default=ServerConfig.CORS_ORIGIN,
+                        help="Access-Control-Allow-Origin for the web front end")
+    parser.add_argument('--rules-only', action='store_true',
+                        help="skip OpenAI and use rule-based analysis only")
+    parser.add_argument('--scrape-backend', choices=['praw', 'async'], default=APIConfig.REDDIT_SCRAPE_BACKEND,
+                        help="scrape each user's listings one after the other (praw) or concurrently (async)")
+    parser.add_argument('--post-store', default=CacheConfig.POST_STORE_PATH,
+                        help="SQLite cache of scraped posts ('' to disable)")
+    parser.add_argument('--cohort-index', default=CacheConfig.COHORT_INDEX_PATH,
+                        help="SQLite index of generated personas for cohort_index.py queries ('' to disable)")
+    args = parser.parse_args(argv)
+
+    print("🚀 Reddit User Persona Analyzer (service mode)")
+    print("=" * 50)
+
+    missing_vars = [var for var in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET') if not os.getenv(var)]
+    if missing_vars:
+        print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
+        return 1
+
+    store = PostStore(args.post_store) if args.post_store else None
+    from cohort_index import CohortIndex
+    cohort_index = CohortIndex(args.cohort_index) if args.cohort_index else None
+    service = PersonaService(workers=args.workers, cache_ttl=args.cache_ttl, store=store,
+                             cohort_index=cohort_index, rules_only=args.rules_only,
+                             scrape_backend=args.scrape_backend)
+    print(f"🔥 {service.workers} warm analyzers ready")
+    try:
+        web.run_app(create_app(service, args.cors_origin), host=args.host, port=args.port)
+    finally:
+        if cohort_index:
+            cohort_index.compile()
+            cohort_index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
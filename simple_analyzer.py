@@ -4,11 +4,15 @@ Simplified Reddit User Persona Analyzer
 Works without external Python dependencies
 """
 
-import json
 import re
-import urllib.request
-import urllib.parse
 from datetime import datetime
+from typing import Optional
+
+from activity_index import ActivityIndex
+from keyword_matcher import detect_categories, get_default_matcher
+from listing_fetcher import ListingFetcher
+from models import RedditPost
+from ratelimit import create_scheduler
 
 
 class SimpleRedditAnalyzer:
@@ -16,6 +20,8 @@ class SimpleRedditAnalyzer:
     
     def __init__(self):
         self.user_agent = 'PersonaAnalyzer/1.0'
+        self.scheduler = create_scheduler()
+        self.fetcher = ListingFetcher(self.user_agent, scheduler=self.scheduler)
     
     def extract_username_from_url(self, profile_url: str) -> str:
         """Extract username from Reddit profile URL"""
@@ -31,18 +37,13 @@ class SimpleRedditAnalyzer:
         
         raise ValueError(f"Could not extract username from URL: {profile_url}")
     
-    def fetch_reddit_data(self, username: str):
-        """Fetch Reddit data using public JSON API"""
+    def fetch_reddit_data(self, username: str, max_pages: Optional[int] = None):
+        """Fetch Reddit data using public JSON API, following pagination up to max_pages"""
         try:
             # Use Reddit's public JSON API
-            url = f"https://www.reddit.com/user/{username}.json"
-            
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', self.user_agent)
-            
-            with urllib.request.urlopen(req) as response:
-                data = json.loads(response.read().decode())
-                return data
+            data = self.fetcher.fetch_listing(username, max_pages)
+            print(f"Fetched {len(data['data']['children'])} posts and comments")
+            return data
                 
         except Exception as e:
             print(f"Error fetching data: {e}")
@@ -57,12 +58,12 @@ class SimpleRedditAnalyzer:
         
         # Basic analysis
         total_posts = len(posts)
-        subreddits = set()
+        activity = ActivityIndex()
         all_text = ""
         
         for post in posts:
             post_data = post['data']
-            subreddits.add(post_data.get('subreddit', 'unknown'))
+            activity.add(RedditPost.from_listing_item(post))
             
             # Collect text content
             title = post_data.get('title', '')
@@ -78,13 +79,13 @@ class SimpleRedditAnalyzer:
 ## Analysis Overview
 - **Analysis Date**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 - **Total Posts Analyzed**: {total_posts}
-- **Active Subreddits**: {len(subreddits)}
+- **Active Subreddits**: {len(activity)}
 
 ## Detected Interests
 {', '.join(interests) if interests else 'No clear patterns detected'}
 
-## Active Communities
-{', '.join(list(subreddits)[:10])}
+## Top Subreddits
+{', '.join(f"r/{a.subreddit} ({a.items})" for a in activity.ranked(10))}
 
 ## Sample Content Analysis
 """
@@ -100,21 +101,9 @@ class SimpleRedditAnalyzer:
         return persona
     
     def detect_interests(self, text: str) -> list:
-        """Simple keyword-based interest detection"""
-        text_lower = text.lower()
-        
-        interest_keywords = {
-            "Technology": ["python", "programming", "code", "tech", "software", "ai", "ml"],
-            "Gaming": ["game", "gaming", "pc", "console", "steam"],
-            "Sports": ["football", "basketball", "soccer", "sports"],
-            "Finance": ["stock", "investment", "crypto", "bitcoin"],
-            "Health": ["workout", "fitness", "health", "exercise"]
-        }
-        
-        detected = []
-        for category, keywords in interest_keywords.items():
-            if sum(1 for keyword in keywords if keyword in text_lower) >= 2:
-                detected.append(category)
+        """Keyword-based interest detection in a single pass over the text"""
+        interest_hits = get_default_matcher().score(text)['interests']
+        detected = detect_categories(interest_hits, min_keywords=2)
         
         return detected
     
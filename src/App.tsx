@@ -156,6 +156,30 @@ NOTE: This is a demo version showing the analysis format.
 The actual implementation requires Reddit API access and runs locally.`;
   };
 
+  const streamPersona = (apiUrl: string, username: string, onText: (persona: string) => void) =>
+    new Promise<AnalysisResult>((resolve, reject) => {
+      const source = new EventSource(`${apiUrl}/api/persona/${encodeURIComponent(username)}/stream`);
+      let persona = '';
+
+      source.addEventListener('text', event => {
+        persona += JSON.parse((event as MessageEvent).data).text;
+        onText(persona);
+      });
+      // The AI stream failed midway; the rule-based persona follows
+      source.addEventListener('reset', () => {
+        persona = '';
+      });
+      source.addEventListener('done', event => {
+        source.close();
+        resolve(JSON.parse((event as MessageEvent).data));
+      });
+      source.addEventListener('error', event => {
+        source.close();
+        const data = (event as MessageEvent).data;
+        reject(new Error(data ? JSON.parse(data).error : 'Could not reach the persona service'));
+      });
+    });
+
   const handleAnalyze = async () => {
     if (!profileUrl.trim()) {
       setError('Please enter a Reddit profile URL');
@@ -168,6 +192,21 @@ The actual implementation requires Reddit API access and runs locally.`;
 
     try {
       const username = extractUsername(profileUrl);
+
+      // Use the persona service (python server.py) when one is configured,
+      // showing the persona while it is being written
+      const apiUrl = import.meta.env.VITE_API_URL;
+      if (apiUrl) {
+        const data = await streamPersona(apiUrl, username, persona =>
+          setResult({ username, persona, timestamp: new Date().toISOString() })
+        );
+        setResult({
+          username: data.username,
+          persona: data.persona,
+          timestamp: data.timestamp
+        });
+        return;
+      }
       
       // Simulate processing time
       await new Promise(resolve => setTimeout(resolve, 1500));